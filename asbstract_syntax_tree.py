@@ -1,13 +1,153 @@
-from antlr4.tree.Tree import ParseTree
+from antlr4 import ParserRuleContext
+from antlr4.Token import CommonToken
+from antlr4.tree.Tree import ParseTree, TerminalNode
+
+class DetachedInputStream():
+    """Stand-in for the input stream of tokens of a tree that was sent between processes.
+
+    The listeners only need the name of the file a token was read from.
+    """
+
+    def __init__(self, fileName: str):
+        """Initialize the stream with the name of the file."""
+
+        self.fileName = fileName
 
 class AST():
-    """Container for ParseTree and file path of the file from which the ParseTree was generated."""
+    """Container for ParseTree and file path of the file from which the ParseTree was generated.
+
+    An AST can be pickled, e.g. to send it from a worker process to the main process.
+    The tree is then encoded as flat lists of nodes and tokens, without the parser, lexer and input stream,
+    because those can not be pickled and deep trees exceed the recursion limit of pickle.
+    """
 
     tree = None
     file_path = None
-    
-    def __init__(self, file_path: str, tree: ParseTree) -> 'AST':
-        """ Initialize the AST object with the file path and ParseTree."""
+    used_ll_fallback = False
+
+    def __init__(self, file_path: str, tree: ParseTree, used_ll_fallback: bool = False) -> 'AST':
+        """ Initialize the AST object with the file path and ParseTree.
+
+        used_ll_fallback tells whether the file had to be parsed again with full LL prediction after SLL prediction failed.
+        """
 
         self.file_path = file_path
-        self.tree = tree
\ No newline at end of file
+        self.tree = tree
+        self.used_ll_fallback = used_ll_fallback
+
+    def __reduce__(self):
+        """ Pickle the AST as its file path and the flat encoding of its tree."""
+
+        return (AST._from_flat_tree, (self.file_path, *self._to_flat_tree(), self.used_ll_fallback))
+
+    def _to_flat_tree(self):
+        """ Encode the tree as a list of tokens and a list of nodes in pre-order.
+
+        Nodes and tokens refer to each other by their index in these lists.
+        """
+
+        tokens, token_indices = [], {}
+        nodes, node_indices = [], {}
+
+        def token_index(token):
+            """ Returns the index of the token in tokens, adding it if needed."""
+
+            if token is None:
+                return None
+            if id(token) not in token_indices:
+                token_indices[id(token)] = len(tokens)
+                tokens.append((token.type, token.channel, token.start, token.stop, token.tokenIndex, token.line, token.column, token.text))
+            return token_indices[id(token)]
+
+        def encode_attribute(value):
+            """ Encode a label attribute of a generated context, which may refer to other nodes or tokens."""
+
+            if isinstance(value, ParserRuleContext):
+                # Labels can refer to contexts that did not end up in the tree.
+                return ("node", node_indices[id(value)]) if id(value) in node_indices else ("value", None)
+            if isinstance(value, CommonToken):
+                return ("token", token_index(value))
+            if isinstance(value, list):
+                return ("list", [encode_attribute(element) for element in value])
+            return ("value", value)
+
+        # Assign indices in pre-order first, so attributes can refer to any node.
+        stack = [(self.tree, None)]
+        ordered = []
+        while stack:
+            node, parent_index = stack.pop()
+            node_indices[id(node)] = len(ordered)
+            ordered.append((node, parent_index))
+            if not isinstance(node, TerminalNode) and node.children:
+                for child in reversed(node.children):
+                    stack.append((child, node_indices[id(node)]))
+
+        for node, parent_index in ordered:
+            if isinstance(node, TerminalNode):
+                nodes.append((type(node), parent_index, token_index(node.symbol)))
+            else:
+                attributes = {name: encode_attribute(value) for name, value in getattr(node, "__dict__", {}).items()}
+                nodes.append((type(node), parent_index, node.invokingState, token_index(node.start), token_index(node.stop), attributes))
+
+        return tokens, nodes
+
+    @staticmethod
+    def _from_flat_tree(file_path: str, tokens: list, nodes: list, used_ll_fallback: bool = False) -> 'AST':
+        """ Rebuild an AST from the flat encoding created by _to_flat_tree."""
+
+        source = (None, DetachedInputStream(file_path))
+        decoded_tokens = []
+        for (token_type, channel, start, stop, token_index, line, column, text) in tokens:
+            token = CommonToken.__new__(CommonToken)
+            token.source = source
+            token.type = token_type
+            token.channel = channel
+            token.start = start
+            token.stop = stop
+            token.tokenIndex = token_index
+            token.line = line
+            token.column = column
+            token._text = text
+            decoded_tokens.append(token)
+
+        def decode_attribute(value):
+            """ Decode a label attribute encoded by encode_attribute."""
+
+            kind, content = value
+            if kind == "node":
+                return decoded_nodes[content]
+            if kind == "token":
+                return decoded_tokens[content]
+            if kind == "list":
+                return [decode_attribute(element) for element in content]
+            return content
+
+        decoded_nodes = []
+        for encoded in nodes:
+            node_class, parent_index = encoded[0], encoded[1]
+            parent = decoded_nodes[parent_index] if parent_index is not None else None
+            node = node_class.__new__(node_class)
+            node.parentCtx = parent
+            if issubclass(node_class, TerminalNode):
+                node.symbol = decoded_tokens[encoded[2]]
+            else:
+                node.invokingState = encoded[2]
+                node.start = decoded_tokens[encoded[3]] if encoded[3] is not None else None
+                node.stop = decoded_tokens[encoded[4]] if encoded[4] is not None else None
+                node.children = None
+                node.exception = None
+                node.parser = None
+            if parent is not None:
+                if parent.children is None:
+                    parent.children = []
+                parent.children.append(node)
+            decoded_nodes.append(node)
+
+        # Attributes are restored last, as they may refer to nodes that come later in pre-order.
+        for node, encoded in zip(decoded_nodes, nodes):
+            if not issubclass(encoded[0], TerminalNode):
+                for name, value in encoded[5].items():
+                    if name != "parser":
+                        setattr(node, name, decode_attribute(value))
+
+        return AST(file_path, decoded_nodes[0] if decoded_nodes else None, used_ll_fallback)
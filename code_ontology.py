@@ -0,0 +1,99 @@
+import os
+import pickle
+import tempfile
+from rdflib import Graph, RDFS, URIRef
+
+CODE_ONTOLOGY_URL = "http://se-on.org/ontologies/domain-specific/2012/02/code.owl"
+# Copy of the class hierarchy of the ontology that is shipped with the tool, so runs do not need the network.
+BUNDLED_CODE_ONTOLOGY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ontologies", "code.owl")
+DEFAULT_ONTOLOGY_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "code-to-spif", "ontology")
+# Environment variable with the path of an ontology to use instead of the bundled or published one.
+ONTOLOGY_PATH_ENVIRONMENT_VARIABLE = "CODE_TO_SPIF_ONTOLOGY"
+
+class CodeOntology():
+    """Class hierarchy of the SEON code ontology.
+
+    The hierarchy is read from the first source that is available:
+    1. the ontology at the override path (set_override_path or the CODE_TO_SPIF_ONTOLOGY environment variable),
+    2. the ontology bundled with the tool in ontologies/code.owl,
+    3. a class hierarchy table cached on local disk by an earlier run,
+    4. the published ontology, which is then cached for later runs. This fallback is only reached if the bundled copy was removed.
+
+    The hierarchy is loaded once per process and shared by every OWLConstructor.
+    """
+
+    _override_path = None
+    _loaded = None
+
+    def __init__(self, direct_sub_classes: dict):
+        """Initializes the ontology with a map of each class to the list of its direct subclasses."""
+
+        self.direct_sub_classes = direct_sub_classes
+
+    @staticmethod
+    def set_override_path(ontology_path: str):
+        """Makes get load the ontology at ontology_path instead of the bundled or published one."""
+
+        CodeOntology._override_path = ontology_path
+        CodeOntology._loaded = None
+
+    @staticmethod
+    def get(cache_directory: str = DEFAULT_ONTOLOGY_CACHE_DIRECTORY) -> 'CodeOntology':
+        """Returns the class hierarchy of the code ontology, loading it on first use."""
+
+        if CodeOntology._loaded is None:
+            CodeOntology._loaded = CodeOntology._load(cache_directory)
+        return CodeOntology._loaded
+
+    @staticmethod
+    def from_graph(graph: Graph) -> 'CodeOntology':
+        """Reads the class hierarchy from the subClassOf triples of graph."""
+
+        direct_sub_classes = {}
+        for sub_class, super_class in graph.subject_objects(RDFS.subClassOf):
+            direct_sub_classes.setdefault(super_class, []).append(sub_class)
+        return CodeOntology(direct_sub_classes)
+
+    @staticmethod
+    def _load(cache_directory: str) -> 'CodeOntology':
+        """Loads the class hierarchy from the first available source, see the class description."""
+
+        override_path = CodeOntology._override_path or os.environ.get(ONTOLOGY_PATH_ENVIRONMENT_VARIABLE)
+        if override_path:
+            if not os.path.isfile(override_path):
+                raise Exception(f"Provided ontology does not exist: {override_path}")
+            return CodeOntology.from_graph(Graph().parse(override_path, format="xml"))
+        if os.path.isfile(BUNDLED_CODE_ONTOLOGY_PATH):
+            return CodeOntology.from_graph(Graph().parse(BUNDLED_CODE_ONTOLOGY_PATH, format="xml"))
+
+        cache_file_path = os.path.join(cache_directory, "code-class-hierarchy.pickle")
+        if os.path.isfile(cache_file_path):
+            try:
+                with open(cache_file_path, 'rb') as f:
+                    cached = pickle.load(f)
+                return CodeOntology({URIRef(super_class): [URIRef(sub_class) for sub_class in sub_classes] for super_class, sub_classes in cached.items()})
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+                print(f"Ignoring unreadable ontology cache {cache_file_path}: {e}")
+
+        try:
+            graph = Graph().parse(CODE_ONTOLOGY_URL)
+        except Exception as e:
+            raise Exception(f"The code ontology is not bundled in {BUNDLED_CODE_ONTOLOGY_PATH} and could not be downloaded from {CODE_ONTOLOGY_URL}: {e}. "
+                            f"Restore the bundled copy, or give the path of a local copy with --ontology or {ONTOLOGY_PATH_ENVIRONMENT_VARIABLE}.") from e
+        ontology = CodeOntology.from_graph(graph)
+        ontology._save(cache_file_path)
+        return ontology
+
+    def _save(self, cache_file_path: str):
+        """Writes the class hierarchy as a table of plain strings to cache_file_path."""
+
+        table = {str(super_class): [str(sub_class) for sub_class in sub_classes] for super_class, sub_classes in self.direct_sub_classes.items()}
+        try:
+            os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+            # Write to a temporary file first, so concurrent runs never read a truncated cache.
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(cache_file_path), suffix=".tmp")
+            with os.fdopen(file_descriptor, 'wb') as f:
+                pickle.dump(table, f)
+            os.replace(temporary_path, cache_file_path)
+        except OSError as e:
+            print(f"Could not cache the ontology in {cache_file_path}: {e}")
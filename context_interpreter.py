@@ -1,3 +1,5 @@
+import os
+import base64
 import hashlib
 from urllib.parse import quote
 import uuid
@@ -8,20 +10,59 @@ class ContextInterpreter():
 
     """ This class stores some helpers for interpreting ANTLR context objects."""
 
+    def __init__(self, *args, compact_ids: bool = False, root_path: str = None, **kwargs):
+        """ Set up the cache of hashed file names.
+
+        With compact_ids, node IDs end with a short base32 digest of the file name instead of the full SHA-256 hash as a decimal number.
+        File names under root_path, the folder the input was copied or extracted to, are used relative to it, so node IDs do not depend on where that folder is.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.compact_ids = compact_ids
+        self.root_path = os.path.abspath(root_path) if root_path else None
+        # File name -> the part of the node IDs that identifies the file.
+        self._hashed_filenames = {}
+
     def filename_from_ctx(self, ctx):
         """ Get the filename of the input stream that the context object is associated with."""
 
         return ctx.start.getInputStream().fileName
 
+    def relative_file_path(self, file_path: str):
+        """ Get the path of the file relative to the root path if it is under the root path, otherwise the path itself."""
+
+        if self.root_path and file_path.startswith(self.root_path + os.sep):
+            return file_path[len(self.root_path) + 1:]
+        return file_path
+
     def create_deterministic_node_id_from_filename_line_column(self, filename: str, line: int, column: int):
         """ Create a deterministic node ID from a filename, line number, and column number."""
 
+        hashed_filename = self._hashed_filenames.get(filename)
+        if hashed_filename is None:
+            hashed_filename = self._hashed_filenames[filename] = self._hash_filename(self.relative_file_path(filename))
+        return str(f"{line}_{column}_{hashed_filename}")
+
+    def create_deterministic_node_id_from_code_identifier(self, code_identifier: str, class_name: str):
+        """ Create a deterministic node ID for a thing outside of the code base from its code identifier and class name.
+
+        Lines in files start at 1, so line 0 keeps these IDs apart from the IDs of things in the code base.
+        """
+
+        return self.create_deterministic_node_id_from_filename_line_column(f"{class_name}:{code_identifier}", 0, 0)
+
+    def _hash_filename(self, filename: str):
+        """ Hash a filename for the node IDs of the things in that file."""
+
         filename = quote(filename) # URL encode filename
         hasher = hashlib.sha256()
         hasher.update(filename.encode('utf-8'))
+        if self.compact_ids:
+            # 80 bits of the hash as 16 lowercase base32 characters.
+            return base64.b32encode(hasher.digest()[:10]).decode('ascii').lower()
         hash_string = hasher.hexdigest()
         filename_number = int(hash_string, 16)
-        return str(f"{line}_{column}_{filename_number}")
+        return str(filename_number)
 
     def create_deterministic_node_id_from_ctx(self, ctx):
         """ Create a deterministic node ID from an ANTLR context object."""
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from main import parse_arguments, convert as convert_input
+from dfa_cache import DFACache
+from code_ontology import CodeOntology
+from supported_language import supported_languages
+from language_server_pool import LanguageServerPool
+
+DEFAULT_PORT = 8765
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(tempfile.gettempdir(), "code-to-spif-output")
+
+class ConversionRequestError(Exception):
+    """Raised for a conversion request that can not be run, e.g. because its input does not exist."""
+
+class ConversionServer(HTTPServer):
+    """HTTP server that converts code bases to SPIF in one long-running process.
+
+    Starting the tool for every code base costs more than converting a small one: importing the generated parsers,
+    deserializing their ATNs and loading the code ontology. The server does this once when it starts, and the DFAs
+    that the parsers build while parsing stay warm from one conversion to the next.
+    Every conversion copies or extracts its input to the same workspace folder of the server, so the language servers
+    are only started once and are told about the files that changed between conversions, see LanguageServerPool.
+
+    Conversions are run one at a time, in the order in which they are requested.
+    """
+
+    def __init__(self, server_address: tuple, conversion_arguments: list[str], output_directory: str = DEFAULT_OUTPUT_DIRECTORY):
+        """Initializes the server.
+
+        Args:
+            server_address (tuple): (host, port) to listen on.
+            conversion_arguments (list[str]): CLI arguments of main.py that are passed to every conversion, e.g. ["--jobs", "4"].
+            output_directory (str): Directory to write the output of conversions to that do not ask for an output path.
+
+        Raises SystemExit if the conversion arguments are invalid, like main.py does.
+        """
+        self.default_arguments = parse_arguments(["conversion_server", "", ""] + conversion_arguments)
+        super().__init__(server_address, ConversionRequestHandler)
+        self.conversion_arguments = conversion_arguments
+        self.output_directory = output_directory
+        self.conversions = 0
+        # The input of a conversion stays in the workspace until the next one replaces it, the language servers keep indexing the folder.
+        self.workspace_path = tempfile.mkdtemp(prefix="code-to-spif-server-", dir=self.default_arguments.workspace_directory)
+        self.language_servers = LanguageServerPool(os.path.join(self.workspace_path, "input"))
+
+    def warm_up(self):
+        """Loads the code ontology and, if the conversions use a DFA cache, the cached DFAs of all languages."""
+
+        arguments = self.default_arguments
+        if arguments.ontology:
+            CodeOntology.set_override_path(arguments.ontology)
+        CodeOntology.get()
+        if arguments.dfa_cache:
+            dfa_cache = DFACache(arguments.dfa_cache)
+            for language in supported_languages:
+                dfa_cache.load(language)
+
+    def convert(self, request: dict) -> str:
+        """Runs the conversion that is requested, and returns the path of the output file.
+
+        Args:
+            request (dict): "input" is the path of the zip archive or directory to convert. Optionally, "output" is the path
+                of the output file and "arguments" a list of CLI arguments of main.py for this conversion only.
+        """
+        input_path = request.get("input")
+        if not isinstance(input_path, str) or not os.path.exists(input_path):
+            raise ConversionRequestError(f"Input does not exist: {input_path}")
+        extra_arguments = request.get("arguments", [])
+        if not isinstance(extra_arguments, list) or not all(isinstance(argument, str) for argument in extra_arguments):
+            raise ConversionRequestError("arguments must be a list of strings.")
+
+        output_file_path = request.get("output")
+        try:
+            arguments = parse_arguments(["conversion_server", input_path, output_file_path or ""] + self.conversion_arguments + extra_arguments)
+        except SystemExit:
+            raise ConversionRequestError(f"Invalid arguments: {extra_arguments}")
+        if not output_file_path:
+            os.makedirs(self.output_directory, exist_ok=True)
+            input_name = os.path.splitext(os.path.basename(os.path.normpath(input_path)))[0]
+            file_descriptor, arguments.output_file_path = tempfile.mkstemp(dir=self.output_directory, prefix=f"{input_name}-", suffix=".spif")
+            os.close(file_descriptor)
+
+        input_folder_path = self.language_servers.root_path
+        shutil.rmtree(input_folder_path, ignore_errors=True)
+        try:
+            convert_input(arguments, input_folder_path, self.language_servers)
+        except BaseException:
+            # Do not leave an empty or partial output behind in the output directory.
+            if not output_file_path:
+                os.remove(arguments.output_file_path)
+            # The language servers are started again for the next conversion, in case they caused the failure.
+            self.language_servers.close()
+            raise
+        finally:
+            # The ontology of a request only applies to that request.
+            if arguments.ontology != self.default_arguments.ontology:
+                CodeOntology.set_override_path(self.default_arguments.ontology)
+        self.conversions += 1
+        return os.path.abspath(arguments.output_file_path)
+
+    def server_close(self):
+        """Stops the language servers and removes the workspace, besides closing the socket."""
+
+        super().server_close()
+        self.language_servers.close()
+        shutil.rmtree(self.workspace_path, ignore_errors=True)
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests to a ConversionServer.
+
+    POST /convert runs a conversion, see ConversionServer.convert. The request body is a JSON object, e.g.
+    {"input": "/data/upload.zip"}, and the response body a JSON object with the absolute path of the output file as "output".
+    GET /status returns the number of conversions the server ran.
+    """
+
+    def do_POST(self):
+        """Runs the conversion in the request body."""
+
+        if self.path != "/convert":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        start_time = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"The request body is not valid JSON: {e}"})
+            return
+        if not isinstance(request, dict):
+            self._send_json(400, {"error": "The request body must be a JSON object."})
+            return
+
+        try:
+            output_file_path = self.server.convert(request)
+        except ConversionRequestError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"Conversion failed: {e!r}"})
+        else:
+            self._send_json(200, {"output": output_file_path, "seconds": round(time.perf_counter() - start_time, 2)})
+
+    def do_GET(self):
+        """Returns the status of the server."""
+
+        if self.path != "/status":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self._send_json(200, {"conversions": self.server.conversions})
+
+    def _send_json(self, status: int, body: dict):
+        """Sends a response with status and body encoded as JSON."""
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def parse_server_arguments(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    """Parses the provided CLI arguments of the server.
+
+    Args:
+        argv (list[str]): List of the provided CLI arguments, starting with the program name.
+
+    Returns:
+        tuple[argparse.Namespace, list[str]]: The parsed arguments of the server, and the other arguments, which are passed to every conversion.
+    """
+    parser = argparse.ArgumentParser(prog=argv[0], allow_abbrev=False, description="Runs a local HTTP server that converts code bases to SPIF, keeping the parsers and the ontology loaded between conversions.",
+                                     epilog="Other arguments, e.g. --jobs 4 or --lsp-cache, are passed to every conversion, see main.py --help.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--output-directory", default=DEFAULT_OUTPUT_DIRECTORY, metavar="DIRECTORY",
+                        help=f"Directory to write the output to if a request does not give an output path (default: {DEFAULT_OUTPUT_DIRECTORY}).")
+    return parser.parse_known_args(argv[1:])
+
+def main(argv):
+    """Starts the server and handles requests until it is interrupted.
+
+    Args:
+        argv (list[str]): List of the provided CLI arguments.
+    """
+
+    server_arguments, conversion_arguments = parse_server_arguments(argv)
+    server = ConversionServer((server_arguments.host, server_arguments.port), conversion_arguments, server_arguments.output_directory)
+    warm_up_start_time = time.perf_counter()
+    server.warm_up()
+    print(f"Warmed up in {time.perf_counter() - warm_up_start_time:.2f} seconds.")
+    print(f"Listening for conversions on http://{server_arguments.host}:{server.server_address[1]}/convert")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,249 @@
+import io
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+from antlr4.PredictionContext import PredictionContext, SingletonPredictionContext, ArrayPredictionContext
+from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.LexerActionExecutor import LexerActionExecutor
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.dfa.DFA import DFA
+from antlr4.dfa.DFAState import DFAState
+from supported_language import SupportedLanguage
+
+DEFAULT_DFA_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "code-to-spif", "dfa")
+
+class _DFAPickler(pickle.Pickler):
+    """Pickler for the DFAs of one recognizer.
+
+    ATN states, lexer actions and the runtime singletons are not pickled but referred to, so they are
+    the objects of the recognizer the DFAs are loaded into. Objects that cache hash codes are pickled as
+    their constructor arguments, because string hashes differ between Python processes.
+    DFA states are pickled without their edges, the edges are stored separately by DFACache.
+    """
+
+    def __init__(self, file, atn):
+        """Initializes the pickler for the DFAs of atn."""
+
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._lexer_action_indices = {id(action): index for index, action in enumerate(atn.lexerActions or [])}
+
+    def persistent_id(self, obj):
+        """Returns a reference for objects that belong to the ATN or the runtime, or None to pickle obj."""
+
+        if isinstance(obj, ATNState):
+            return ("state", obj.stateNumber)
+        if obj is PredictionContext.EMPTY:
+            return ("empty_context", None)
+        if obj is SemanticContext.NONE:
+            return ("no_semantic_context", None)
+        if id(obj) in self._lexer_action_indices:
+            return ("lexer_action", self._lexer_action_indices[id(obj)])
+        return None
+
+    def reducer_override(self, obj):
+        """Pickles the objects with cached hash codes and DFA states by their fields."""
+
+        if isinstance(obj, SingletonPredictionContext):
+            return (SingletonPredictionContext, (obj.parentCtx, obj.returnState))
+        if isinstance(obj, ArrayPredictionContext):
+            return (ArrayPredictionContext, (obj.parents, obj.returnStates))
+        if isinstance(obj, ATNConfigSet):
+            return (_rebuild_config_set, (obj.fullCtx, obj.readonly, obj.configs, obj.uniqueAlt, obj.conflictingAlts,
+                                          obj.hasSemanticContext, obj.dipsIntoOuterContext, obj.configLookup is not None))
+        if isinstance(obj, LexerActionExecutor):
+            return (LexerActionExecutor, (obj.lexerActions,))
+        if isinstance(obj, DFAState):
+            return (_rebuild_dfa_state, (obj.stateNumber, obj.configs, obj.isAcceptState, obj.prediction,
+                                         obj.lexerActionExecutor, obj.requiresFullContext, obj.predicates))
+        return NotImplemented
+
+class _DFAUnpickler(pickle.Unpickler):
+    """Unpickler for DFAs pickled by _DFAPickler."""
+
+    def __init__(self, file, atn):
+        """Initializes the unpickler for the DFAs of atn."""
+
+        super().__init__(file)
+        self._atn = atn
+
+    def persistent_load(self, pid):
+        """Returns the object of the ATN or the runtime that pid refers to."""
+
+        kind, value = pid
+        if kind == "state":
+            return self._atn.states[value]
+        if kind == "empty_context":
+            return PredictionContext.EMPTY
+        if kind == "no_semantic_context":
+            return SemanticContext.NONE
+        if kind == "lexer_action":
+            return self._atn.lexerActions[value]
+        raise pickle.UnpicklingError(f"Unknown persistent id: {pid}")
+
+def _rebuild_config_set(fullCtx, readonly, configs, uniqueAlt, conflictingAlts, hasSemanticContext, dipsIntoOuterContext, hasLookup):
+    """Rebuilds an ATNConfigSet pickled by _DFAPickler, recomputing its lookup table and hash code."""
+
+    config_set = ATNConfigSet(fullCtx)
+    for config in configs:
+        config_set.configs.append(config)
+        if hasLookup:
+            config_set.getOrAdd(config)
+    if not hasLookup:
+        config_set.configLookup = None
+    config_set.readonly = readonly
+    config_set.uniqueAlt = uniqueAlt
+    config_set.conflictingAlts = conflictingAlts
+    config_set.hasSemanticContext = hasSemanticContext
+    config_set.dipsIntoOuterContext = dipsIntoOuterContext
+    return config_set
+
+def _rebuild_dfa_state(stateNumber, configs, isAcceptState, prediction, lexerActionExecutor, requiresFullContext, predicates):
+    """Rebuilds a DFAState pickled by _DFAPickler, without its edges."""
+
+    state = DFAState(stateNumber, configs)
+    state.isAcceptState = isAcceptState
+    state.prediction = prediction
+    state.lexerActionExecutor = lexerActionExecutor
+    state.requiresFullContext = requiresFullContext
+    state.predicates = predicates
+    return state
+
+class DFACache():
+    """Local cache of the DFA states that the ANTLR lexers and parsers build while they parse.
+
+    The generated recognizers share their DFAs between all instances of a class, but start with empty DFAs in every process,
+    which makes the first files of a run much slower to parse than the later ones. This cache saves the DFAs at the end of a run
+    and loads them into the recognizer classes at the start of the next one.
+
+    Cache files are keyed by the serialized ATN of the grammar, so a regenerated grammar never loads DFAs of an older one.
+    """
+
+    def __init__(self, cache_directory: str = DEFAULT_DFA_CACHE_DIRECTORY):
+        """Initializes the cache, stored in cache_directory."""
+
+        self.cache_directory = cache_directory
+
+    def get_cache_file_path(self, recognizer_class: type) -> str:
+        """Returns the path of the cache file of the DFAs of recognizer_class (a generated lexer or parser class)."""
+
+        serialized_atn = sys.modules[recognizer_class.__module__].serializedATN()
+        atn_hash = hashlib.sha256(repr(list(serialized_atn)).encode()).hexdigest()
+        return os.path.join(self.cache_directory, f"{recognizer_class.__name__}-{atn_hash}.pickle")
+
+    def load(self, language: SupportedLanguage) -> bool:
+        """Loads the cached DFAs of the lexer and parser of language into their classes, if the recognizer did not load them yet.
+
+        Returns:
+            bool: True if cached DFAs were found for both the lexer and the parser.
+        """
+        return all([self.load_recognizer(language.lexer), self.load_recognizer(language.parser)])
+
+    def save(self, language: SupportedLanguage):
+        """Saves the DFAs of the lexer and parser of language to the cache."""
+
+        self.save_recognizer(language.lexer)
+        self.save_recognizer(language.parser)
+
+    def load_recognizer(self, recognizer_class: type) -> bool:
+        """Replaces the DFAs of recognizer_class by the cached ones, if there are any and they were not loaded before.
+
+        Returns:
+            bool: True if the recognizer uses cached DFAs.
+        """
+        if getattr(recognizer_class, "_loaded_dfa_cache", False):
+            return True
+        cache_file_path = self.get_cache_file_path(recognizer_class)
+        if not os.path.isfile(cache_file_path):
+            return False
+
+        try:
+            with open(cache_file_path, 'rb') as f:
+                dfas = self._decode(_DFAUnpickler(f, recognizer_class.atn).load(), recognizer_class.atn)
+        except (OSError, pickle.UnpicklingError, EOFError, IndexError, AttributeError, TypeError, RecursionError) as e:
+            print(f"Ignoring unreadable DFA cache {cache_file_path}: {e}")
+            return False
+        if len(dfas) != len(recognizer_class.decisionsToDFA):
+            print(f"Ignoring DFA cache {cache_file_path}: it does not match the grammar.")
+            return False
+
+        # Replace the DFAs in place, recognizers hand the class' list to their ATN simulator.
+        recognizer_class.decisionsToDFA[:] = dfas
+        recognizer_class._loaded_dfa_cache = True
+        return True
+
+    def save_recognizer(self, recognizer_class: type):
+        """Writes the DFAs of recognizer_class to its cache file, replacing the old one."""
+
+        cache_file_path = self.get_cache_file_path(recognizer_class)
+        buffer = io.BytesIO()
+        try:
+            _DFAPickler(buffer, recognizer_class.atn).dump(self._encode(recognizer_class.decisionsToDFA))
+        except RecursionError:
+            print(f"Not saving the DFA cache of {recognizer_class.__name__}: its prediction contexts are nested too deeply.")
+            return
+
+        # Write to a temporary file first, so an interrupted run never leaves a truncated cache behind.
+        os.makedirs(self.cache_directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_directory, suffix=".tmp")
+        with os.fdopen(file_descriptor, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(temporary_path, cache_file_path)
+
+    @staticmethod
+    def _encode(dfas: list[DFA]) -> list[tuple]:
+        """Encodes each DFA as its decision, its start state, its states and their edges as indices in the list of states.
+
+        Edges are stored as indices, so pickling never recurses along a path through the DFA.
+        """
+        encoded = []
+        for dfa in dfas:
+            states, state_indices = [], {}
+
+            def state_index(state):
+                """ Returns the index of the state in states, adding it if needed."""
+
+                if state is None:
+                    return None
+                if id(state) not in state_indices:
+                    state_indices[id(state)] = len(states)
+                    states.append(state)
+                return state_indices[id(state)]
+
+            start_index = state_index(dfa.s0)
+            for state in dfa._states:
+                state_index(state)
+            # The start states of a precedence DFA are only reachable through the edges of s0, so the list can grow while it is walked.
+            edges = []
+            position = 0
+            while position < len(states):
+                state = states[position]
+                edges.append(None if state.edges is None else [state_index(target) for target in state.edges])
+                position += 1
+            registered = [state_indices[id(state)] for state in dfa._states]
+            encoded.append((dfa.decision, dfa.precedenceDfa, start_index, states, edges, registered))
+        return encoded
+
+    @staticmethod
+    def _decode(encoded: list[tuple], atn) -> list[DFA]:
+        """Rebuilds the DFAs encoded by _encode for the decisions of atn."""
+
+        return [DFACache._decode_dfa(atn, *encoded_dfa) for encoded_dfa in encoded]
+
+    @staticmethod
+    def _decode_dfa(atn, decision, precedenceDfa, start_index, states, edges, registered) -> DFA:
+        """Rebuilds one DFA encoded by _encode."""
+
+        dfa = DFA.__new__(DFA)
+        dfa.decision = decision
+        dfa.precedenceDfa = precedenceDfa
+        dfa.atnStartState = atn.decisionToState[decision]
+        for state, state_edges in zip(states, edges):
+            state.edges = None if state_edges is None else [None if index is None else states[index] for index in state_edges]
+        dfa.s0 = states[start_index] if start_index is not None else None
+        dfa._states = {}
+        for index in registered:
+            dfa._states[states[index]] = states[index]
+        return dfa
@@ -0,0 +1,127 @@
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Only imported for the annotations, supported_language imports the listeners, which import this module.
+    from supported_language import SupportedLanguage
+
+# Version of the format of the cache files, increase it when the format changes.
+CACHE_FORMAT_VERSION = 1
+DEFAULT_FRAGMENT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "code-to-spif", "fragments")
+
+class FileFragment():
+    """Part of the graph that the initialization walk of one file created.
+
+    The walk of a file only depends on its content, except for the nodes of other files it looks up, e.g. the package it belongs to.
+    A fragment therefore keeps these lookups with their results, and can only be reused while they still give the same results.
+    """
+
+    def __init__(self, triples: list, lookups: list):
+        """Initializes the fragment.
+
+        Args:
+            triples (list): Triples that the walk added to the graph, also the ones that were already in it.
+            lookups (list): (number of triples added before, arguments, result) of the calls to OWLConstructor.get_instances_from_code_identifier that the walk made.
+        """
+        self.triples = triples
+        self.lookups = lookups
+
+class FragmentCache():
+    """Local cache of the fragments of the graph that the initialization walks create, one cache file per fragment.
+
+    A fragment is keyed by the content of its file and everything else the walk depends on: the path of the file relative to the input,
+    which node IDs are made from, whether the IDs are compact, and the version of the grammar and of the listener code.
+    A file with a cached fragment is neither parsed nor walked in the initialization phase, unless it is walked in the second phase.
+
+    Cache files are written atomically, so several runs on the same host can share a cache directory.
+    """
+
+    def __init__(self, cache_directory: str = DEFAULT_FRAGMENT_CACHE_DIRECTORY):
+        """Initializes the cache, stored in cache_directory."""
+
+        self.cache_directory = cache_directory
+        # Version of the grammar and listener code of each language, by language name.
+        self._versions = {}
+        # Key of each file of the run, and the fragments loaded for them, by file path.
+        self._keys = {}
+        self._fragments = {}
+
+    def load_fragments(self, language: 'SupportedLanguage', files: list[str], contents: Iterable[bytes], compact_ids: bool = False, root_path: str = None):
+        """Loads the cached fragments of the files of language, whose contents are given in the same order.
+
+        The contents are hashed one at a time, so they can be read lazily and do not all have to be in memory at once.
+
+        Args:
+            language (SupportedLanguage): Language in which the files were written.
+            files (list[str]): Paths of the files.
+            contents (Iterable[bytes]): Contents of the files, e.g. a generator that reads them.
+            compact_ids (bool): Whether node IDs are made with short digests of the file names.
+            root_path (str): Root path of the files. Fragments are keyed by the paths relative to it, like node IDs, so runs with different root paths share them.
+        """
+        version = self._get_version(language)
+        for file_path, content in zip(files, contents):
+            relative_path = os.path.relpath(file_path, root_path) if root_path else file_path
+            hasher = hashlib.sha256(f"{CACHE_FORMAT_VERSION}\0{version}\0{compact_ids}\0{relative_path}\0".encode('utf-8'))
+            hasher.update(content)
+            self._keys[file_path] = hasher.hexdigest()
+            fragment = self._load(self._get_cache_file_path(file_path))
+            if fragment is not None:
+                self._fragments[file_path] = fragment
+
+    def get_fragment(self, file_path: str) -> FileFragment:
+        """Returns the cached fragment of the file, or None if there is none."""
+
+        return self._fragments.get(file_path)
+
+    def save_fragment(self, file_path: str, fragment: FileFragment):
+        """Writes the fragment of the file to its cache file, replacing the old one."""
+
+        if file_path not in self._keys:
+            return
+        cache_file_path = self._get_cache_file_path(file_path)
+        # Write to a temporary file first, so an interrupted or concurrent run never reads a truncated fragment.
+        os.makedirs(self.cache_directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_directory, suffix=".tmp")
+        with os.fdopen(file_descriptor, 'wb') as f:
+            pickle.dump((CACHE_FORMAT_VERSION, fragment.triples, fragment.lookups), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, cache_file_path)
+        self._fragments[file_path] = fragment
+
+    def _get_cache_file_path(self, file_path: str) -> str:
+        """Returns the path of the cache file of the fragment of the file."""
+
+        return os.path.join(self.cache_directory, f"{self._keys[file_path]}.pickle")
+
+    def _load(self, cache_file_path: str) -> FileFragment:
+        """Returns the fragment stored in cache_file_path, or None if it does not exist or can not be read."""
+
+        if not os.path.isfile(cache_file_path):
+            return None
+        try:
+            with open(cache_file_path, 'rb') as f:
+                version, triples, lookups = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError) as e:
+            print(f"Ignoring unreadable fragment cache file {cache_file_path}: {e}")
+            return None
+        if version != CACHE_FORMAT_VERSION:
+            return None
+        return FileFragment(triples, lookups)
+
+    def _get_version(self, language: 'SupportedLanguage') -> str:
+        """Returns a hash of the grammar of language and of the source code of its listener, which the fragments are made with."""
+
+        if language.name not in self._versions:
+            hasher = hashlib.sha256()
+            for recognizer_class in (language.lexer, language.parser):
+                hasher.update(repr(list(sys.modules[recognizer_class.__module__].serializedATN())).encode())
+            for module_name in dict.fromkeys(cls.__module__ for cls in language.listener.__mro__):
+                module_file = getattr(sys.modules[module_name], "__file__", None)
+                if module_file:
+                    with open(module_file, 'rb') as f:
+                        hasher.update(f.read())
+            self._versions[language.name] = hasher.hexdigest()
+        return self._versions[language.name]
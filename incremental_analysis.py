@@ -0,0 +1,81 @@
+import os
+from rdflib import Graph, Literal
+from context_interpreter import ContextInterpreter
+
+class IncrementalAnalysis():
+    """Reuses the output of an earlier run for the files that did not change since that run.
+
+    Node IDs end with a hash of the path of the file the node is defined in, see ContextInterpreter.
+    That hash tells which file each node of the previous output belongs to. From the previous output:
+    - the triples that involve a node of a changed or deleted file are dropped,
+    - the other triples are reused as they are.
+
+    All files are still parsed and walked in the initialization phase, because the listeners look up nodes of other files.
+    The second phase, which asks the language server for the edges, only walks the affected files.
+    These are the changed files and the files that had an edge to or from a node of a changed or deleted file, so those edges are resolved again.
+
+    The previous output must have been made with the same --compact-ids setting.
+    Edges that the unchanged files did not have before, but that a changed file now makes possible, are only found by a full run.
+    """
+
+    def __init__(self, previous_graph: Graph, changed_files: list[str], compact_ids: bool = False, root_path: str = None):
+        """Initializes the analysis of previous_graph, the output of the previous run, for changed_files.
+
+        Args:
+            previous_graph (Graph): Graph of the output of the previous run.
+            changed_files (list[str]): Absolute paths of the files that were changed, added or deleted since the previous run.
+            compact_ids (bool): Whether the previous run made node IDs with --compact-ids.
+            root_path (str): Root path that the input is copied or extracted to, node IDs use the paths relative to it.
+        """
+        self.previous_graph = previous_graph
+        self.changed_files = set(changed_files)
+        self._context_interpreter = ContextInterpreter(compact_ids=compact_ids, root_path=root_path)
+        self._changed_file_hashes = {self._get_file_hash(file_path) for file_path in self.changed_files}
+
+    def get_affected_files(self, files: list[str]) -> set[str]:
+        """Returns the files, out of files, that the second phase has to walk again."""
+
+        file_paths_by_hash = {self._get_file_hash(file_path): file_path for file_path in files}
+        affected_file_hashes = set(self._changed_file_hashes)
+        for s, _, o in self.previous_graph:
+            if isinstance(o, Literal):
+                continue
+            subject_hash, object_hash = self._get_node_file_hash(s), self._get_node_file_hash(o)
+            if subject_hash in self._changed_file_hashes:
+                affected_file_hashes.add(object_hash)
+            elif object_hash in self._changed_file_hashes:
+                affected_file_hashes.add(subject_hash)
+        return {file_paths_by_hash[file_hash] for file_hash in affected_file_hashes if file_hash in file_paths_by_hash}
+
+    def get_reused_triples(self) -> list:
+        """Returns the triples of the previous output that do not involve a node of a changed or deleted file."""
+
+        return [(s, p, o) for s, p, o in self.previous_graph
+                if self._get_node_file_hash(s) not in self._changed_file_hashes
+                and (isinstance(o, Literal) or self._get_node_file_hash(o) not in self._changed_file_hashes)]
+
+    def _get_file_hash(self, file_path: str) -> str:
+        """Returns the hash that the IDs of the nodes in the file end with."""
+
+        return self._context_interpreter.create_deterministic_node_id_from_filename_line_column(file_path, 0, 0).split("_", 2)[2]
+
+    def _get_node_file_hash(self, node) -> str:
+        """Returns the last part of the ID of the node, which is the hash of its file if it is defined in a file of the input."""
+
+        return str(node).rsplit("_", 1)[-1]
+
+    @staticmethod
+    def load(previous_output_path: str, changed_files_path: str, root_path: str, compact_ids: bool = False) -> 'IncrementalAnalysis':
+        """Loads the previous output and the list of changed files.
+
+        Args:
+            previous_output_path (str): Path of the output of the previous run, in RDF/XML or, if it ends with .nt, N-Triples.
+            changed_files_path (str): Path of a file that lists the changed, added and deleted files, one per line, relative to the input root.
+            root_path (str): Root path that the input is copied or extracted to.
+            compact_ids (bool): Whether the previous run made node IDs with --compact-ids.
+        """
+        output_format = "nt" if previous_output_path.endswith(".nt") else "xml"
+        previous_graph = Graph().parse(previous_output_path, format=output_format)
+        with open(changed_files_path, encoding='utf-8') as f:
+            changed_files = [os.path.join(root_path, line.strip()) for line in f if line.strip()]
+        return IncrementalAnalysis(previous_graph, changed_files, compact_ids, root_path)
@@ -0,0 +1,129 @@
+from rdflib import Graph
+
+class IndexedGraph(Graph):
+    """rdflib Graph that answers the lookups of the listeners from the hash indexes of its store, and can journal its changes.
+
+    The listeners look up single edges and data properties many times per file. Answering those lookups from the
+    subject, predicate and object indexes that rdflib's Memory store keeps avoids building, parsing and evaluating a SPARQL query for each of them.
+    Objects and subjects are returned in the order in which their triples were added.
+
+    Several IndexedGraphs can share a store, e.g. one for each language. Each of them has an identifier of its own, so the store keeps
+    every triple once, while each graph only looks up the triples that were added through it. A Dataset with a default union over
+    the store contains the triples of all of them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initializes the graph like rdflib's Graph."""
+
+        super().__init__(*args, **kwargs)
+        # Triples added and removed since start_journal was called, if it was.
+        self._journal = None
+        # Triples collected since start_collecting_new_triples that pop_new_triples did not return yet, if collecting. Used as an ordered set.
+        self._new_triples = None
+        # Triples passed to add since start_recording_additions, also the ones that were already in the graph, if recording. Used as an ordered set.
+        self._recorded_additions = None
+
+    def add(self, triple):
+        """Adds the triple to the graph."""
+
+        if (self._journal is not None or self._new_triples is not None) and triple not in self:
+            if self._journal is not None:
+                self._journal.append((True, triple))
+            if self._new_triples is not None:
+                self._new_triples[triple] = None
+        if self._recorded_additions is not None:
+            self._recorded_additions[triple] = None
+        super().add(triple)
+        return self
+
+    def addN(self, quads):
+        """Adds the triples of the quads that belong to this graph to the graph."""
+
+        quads = [(s, p, o, c) for s, p, o, c in quads if isinstance(c, Graph) and c.identifier is self.identifier]
+        if self._journal is not None or self._new_triples is not None:
+            added_triples = [(s, p, o) for s, p, o, _ in dict.fromkeys(quads) if (s, p, o) not in self]
+            if self._journal is not None:
+                self._journal.extend((True, triple) for triple in added_triples)
+            if self._new_triples is not None:
+                self._new_triples.update(dict.fromkeys(added_triples))
+        if self._recorded_additions is not None:
+            self._recorded_additions.update(dict.fromkeys((s, p, o) for s, p, o, _ in quads))
+        super().addN(quads)
+        return self
+
+    def remove(self, triple):
+        """Removes the triples matching the triple pattern from the graph."""
+
+        if self._journal is not None or self._new_triples is not None:
+            for s, p, o in list(self.triples(triple)):
+                if self._journal is not None:
+                    self._journal.append((False, (s, p, o)))
+                if self._new_triples is not None:
+                    self._new_triples.pop((s, p, o), None)
+        super().remove(triple)
+        return self
+
+    def start_journal(self):
+        """Starts recording the changes to the graph, so they can be undone with rollback_journal."""
+
+        self._journal = []
+
+    def rollback_journal(self):
+        """Undoes the changes to the graph since start_journal was called and stops recording changes."""
+
+        journal, self._journal = self._journal, None
+        for added, triple in reversed(journal):
+            if added:
+                self.remove(triple)
+            else:
+                self.add(triple)
+
+    def stop_journal(self):
+        """Stops recording the changes to the graph and keeps them."""
+
+        self._journal = None
+
+    def start_collecting_new_triples(self):
+        """Starts collecting the triples of the graph, so they can be written out in batches with pop_new_triples.
+
+        The triples that are already in the graph are collected as well.
+        """
+
+        self._new_triples = dict.fromkeys(self.triples((None, None, None)))
+
+    def pop_new_triples(self) -> list:
+        """Returns the collected triples that are still in the graph and were not returned by an earlier call."""
+
+        new_triples, self._new_triples = list(self._new_triples), {}
+        return new_triples
+
+    def start_recording_additions(self):
+        """Starts recording the triples that are added to the graph, including the ones that it already contains."""
+
+        self._recorded_additions = {}
+
+    def count_recorded_additions(self) -> int:
+        """Returns the number of different triples added since start_recording_additions was called."""
+
+        return len(self._recorded_additions)
+
+    def stop_recording_additions(self) -> list:
+        """Returns the triples that were added since start_recording_additions was called and stops recording them."""
+
+        recorded_additions, self._recorded_additions = self._recorded_additions, None
+        return list(recorded_additions)
+
+    def get_objects(self, subject, predicate) -> list:
+        """Returns the objects of the triples with subject and predicate."""
+
+        return list(self.objects(subject, predicate))
+
+    def get_subjects(self, predicate, object) -> list:
+        """Returns the subjects of the triples with predicate and object."""
+
+        return list(self.subjects(predicate, object))
+
+    def has_triple(self, subject, predicate, object) -> bool:
+        """Returns whether the triple was added through this graph and is still in it."""
+
+        return (subject, predicate, object) in self
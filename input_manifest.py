@@ -0,0 +1,222 @@
+import os
+import codecs
+import shutil
+import zipfile
+from antlr4 import InputStream, FileStream
+from supported_language import SupportedLanguage, supported_languages
+
+# Project and build descriptors that jdtls and clangd read to import a project and resolve its sources.
+PROJECT_FILE_NAMES = {"pom.xml", "build.gradle", "build.gradle.kts", "settings.gradle", "settings.gradle.kts", "gradle.properties",
+                      ".classpath", ".project", "CMakeLists.txt", "compile_commands.json", "compile_flags.txt", ".clangd"}
+# Extensions of project files besides the source files, e.g. CMake modules and the Eclipse settings in .settings/*.prefs.
+PROJECT_FILE_EXTENSIONS = {"cmake", "prefs"}
+# Extensions of C++ headers that are not parsed, but that clangd reads when they are included.
+HEADER_FILE_EXTENSIONS = {"h", "hh", "hpp", "hxx", "h++", "inl", "ipp", "tpp", "tcc"}
+# Directories that only contain build outputs or tool state, which are not part of the project the language servers import.
+BUILD_OUTPUT_DIRECTORIES = {".git", ".svn", ".hg", ".gradle", ".idea", "target", "build", "bin", "out", "dist", "CMakeFiles", "node_modules"}
+
+class ArchiveMemberStream(InputStream):
+    """InputStream over a member of a zip archive.
+
+    Like FileStream, it exposes the path of the file as fileName, which is the path the member is (or would be) extracted to.
+    """
+
+    __slots__ = 'fileName'
+
+    def __init__(self, fileName: str, data: str):
+        """Initialize the stream with the decoded content of the member and the path it represents."""
+
+        super().__init__(data)
+        self.fileName = fileName
+
+class InputManifest():
+    """Index of the files of the input of a run, grouped by file extension.
+
+    The input directory or archive is copied or extracted exactly once.
+    Every supported language then reads its files from this manifest.
+
+    In zip-native mode the archive is only indexed. Source files are read straight out of the archive,
+    and only the files the language servers read are written to root_path: the source files and the project and build
+    descriptors, like pom.xml, build.gradle, CMakeLists.txt or compile_commands.json. Other files, like binaries, and the
+    content of build output directories are never written.
+    """
+
+    def __init__(self, root_path: str, archive_path: str = None):
+        """Initializes an empty manifest for the files under root_path, optionally backed by the zip archive at archive_path."""
+
+        self.root_path = root_path
+        self.archive_path = archive_path
+        self.files_by_extension = {}
+        # Position of each file in the walk, used to hand out files in a stable order.
+        self._walk_order = {}
+        # Archive member name of each file that has not been written to disk yet.
+        self._archive_members = {}
+        self._archive = None
+
+    def add_file(self, file_path: str, archive_member: str = None):
+        """Adds the file at file_path to the manifest.
+
+        If archive_member is given, the file is read from that member of the archive instead of from disk.
+        """
+
+        extension = os.path.basename(file_path).split('.')[-1]
+        self.files_by_extension.setdefault(extension, []).append(file_path)
+        self._walk_order[file_path] = len(self._walk_order)
+        if archive_member:
+            self._archive_members[file_path] = archive_member
+
+    def __getstate__(self):
+        """Returns the state to pickle, e.g. when sending the manifest to worker processes. The opened archive is left out."""
+
+        state = self.__dict__.copy()
+        state['_archive'] = None
+        return state
+
+    def _get_archive(self) -> zipfile.ZipFile:
+        """Returns the opened archive backing this manifest."""
+
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self.archive_path)
+        return self._archive
+
+    def open_input_stream(self, file_path: str) -> InputStream:
+        """Returns an ANTLR input stream over the content of the file at file_path.
+
+        Files that are still inside the archive are decoded straight from it, without touching the disk.
+        Raises UnicodeDecodeError if the file is not valid utf-8.
+        """
+        if file_path not in self._archive_members:
+            return FileStream(file_path, encoding='utf-8')
+
+        data = self._get_archive().read(self._archive_members[file_path])
+        return ArchiveMemberStream(file_path, codecs.decode(data, 'utf-8'))
+
+    def read_bytes(self, file_path: str) -> bytes:
+        """Returns the undecoded content of the file at file_path, read from the archive if it was not written to disk."""
+
+        if file_path not in self._archive_members:
+            with open(file_path, 'rb') as f:
+                return f.read()
+        return self._get_archive().read(self._archive_members[file_path])
+
+    def materialize(self, files: list[str]):
+        """Writes the given files from the archive to disk, e.g. because a language server needs to read them.
+
+        Files that are already on disk are skipped.
+        """
+        for file_path in files:
+            archive_member = self._archive_members.pop(file_path, None)
+            if archive_member is None:
+                continue
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with self._get_archive().open(archive_member) as source, open(file_path, 'wb') as destination:
+                shutil.copyfileobj(source, destination)
+
+    def materialize_project_files(self):
+        """Writes the files from the archive to disk that a language server may read besides the source files that are parsed.
+
+        These are the source files and headers of all supported languages and the project and build descriptors, outside of
+        build output directories, so the language servers resolve the same way as for an extracted archive.
+        """
+        self.materialize([file_path for file_path, archive_member in list(self._archive_members.items()) if self._is_project_file(archive_member)])
+
+    @staticmethod
+    def _is_project_file(archive_member: str) -> bool:
+        """Returns whether the member of the archive is a source file or a project file that is not inside a build output directory.
+
+        A compilation database is kept anywhere, as CMake writes it to the build directory, where clangd looks for it.
+        """
+
+        *directories, filename = archive_member.split('/')
+        if filename == "compile_commands.json":
+            return True
+        if BUILD_OUTPUT_DIRECTORIES.intersection(directories):
+            return False
+        extension = filename.split('.')[-1].lower() if '.' in filename else None
+        return (filename in PROJECT_FILE_NAMES or extension in PROJECT_FILE_EXTENSIONS or extension in HEADER_FILE_EXTENSIONS
+                or any(extension in language.file_extensions for language in supported_languages))
+
+    def close(self):
+        """Closes the archive backing this manifest, if it was opened."""
+
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def get_files_for_language(self, language: SupportedLanguage) -> list[str]:
+        """Returns the paths of the files of language [language] in the order in which they were found.
+
+        Args:
+            language (SupportedLanguage): Language to filter files.
+
+        Returns:
+            list[str]: List of file paths of files written in the language.
+        """
+        files = [file_path for extension in language.file_extensions for file_path in self.files_by_extension.get(extension, [])]
+        files.sort(key=self._walk_order.__getitem__)
+        return files
+
+    @staticmethod
+    def from_input(directory_or_zip_path: str, root_path: str) -> 'InputManifest':
+        """Copies the directory or extracts the archive to root_path and indexes the files it contains.
+
+        Args:
+            directory_or_zip_path (str): Path to the archive to be extracted or directory to be copied.
+            root_path (str): Path of the folder the input is copied or extracted to. Any old content is removed.
+
+        Returns:
+            InputManifest: Manifest of the files found in the input.
+        """
+        # Remove old input folder
+        if os.path.exists(root_path):
+            shutil.rmtree(root_path)
+        # Check if the path is correct:
+        if not os.path.exists(directory_or_zip_path):
+            raise Exception(f"Provided path does not exist: {directory_or_zip_path}")
+        # Check if path is a directory
+        elif os.path.isdir(directory_or_zip_path):
+            # Copy the files from the directory to root_path
+            shutil.copytree(directory_or_zip_path, root_path)
+        else:
+            # Path is a file, assume it's a zip file and extract it
+            shutil.unpack_archive(directory_or_zip_path, root_path, "zip")
+
+        # Walk through the directory structure
+        manifest = InputManifest(root_path)
+        for root, dirs, filenames in os.walk(root_path):
+            for filename in filenames:
+                manifest.add_file(os.path.join(root, filename))
+
+        return manifest
+
+    @staticmethod
+    def from_zip(zip_path: str, root_path: str) -> 'InputManifest':
+        """Indexes the files in the zip archive without extracting it.
+
+        The files are registered under the paths they would have if the archive was extracted to root_path.
+        Nothing is written to disk until materialize is called.
+
+        Args:
+            zip_path (str): Path to the zip archive.
+            root_path (str): Path of the folder that files are written to when they are materialized. Any old content is removed.
+
+        Returns:
+            InputManifest: Manifest of the files in the archive.
+        """
+        # Remove old input folder
+        if os.path.exists(root_path):
+            shutil.rmtree(root_path)
+        if not os.path.isfile(zip_path):
+            raise Exception(f"Provided path is not a zip file: {zip_path}")
+
+        os.makedirs(root_path)
+        manifest = InputManifest(root_path, zip_path)
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.infolist():
+                name = member.filename
+                # Skip directories and members that would end up outside of root_path, like shutil.unpack_archive does.
+                if member.is_dir() or name.startswith('/') or '..' in name.split('/'):
+                    continue
+                manifest.add_file(os.path.join(root_path, *name.split('/')), name)
+
+        return manifest
@@ -0,0 +1,204 @@
+import os
+import pickle
+import hashlib
+import tempfile
+
+# Version of the format of the cache files, increase it when the format changes.
+CACHE_FORMAT_VERSION = 1
+DEFAULT_LANGUAGE_SERVER_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "code-to-spif", "lsp")
+
+class LanguageServerCache():
+    """Memoizes the responses of a language server by request kind, file, line and column.
+
+    Within a run, every position is only sent to the language server once.
+    The responses can also be saved to a cache file and loaded by a later run, so unchanged files skip the language server:
+    - a definition is reused if the file it was requested for and the files it points to have the same content as before,
+    - references can point into any file, so they are only reused if all files of the run have the same content as before,
+      and so are definitions that point to no file of the input, e.g. none at all or one in the standard library, because an added file can change them.
+
+    Runs of different projects can share a cache file: saving adds the responses of a run to the ones already in the file.
+
+    Locations in files under the root path are stored relative to it, so the cache does not depend on where the input was extracted.
+    """
+
+    def __init__(self, root_path: str = None):
+        """Initializes an empty cache for the files under root_path, that the language server resolves file names against."""
+
+        self.hits = 0
+        self.misses = 0
+        # Hits that were answered by a response loaded from a cache file.
+        self.persisted_hits = 0
+        self.root_path = root_path
+        # (request kind, file name, line, column) -> response, for the requests of this run.
+        self._responses = {}
+        # (request kind, content hash of the file, line, column) -> (stored response, content hashes it depends on), loaded from a cache file.
+        self._persisted_responses = {}
+        self._file_hashes = {}
+        self._project_files = []
+        self._project_hash = None
+
+    def get(self, kind: str, file_name: str, line: int, column: int) -> list:
+        """Returns the cached response to the request, or None if the language server has to be asked."""
+
+        response = self.lookup(kind, file_name, line, column)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def lookup(self, kind: str, file_name: str, line: int, column: int) -> list:
+        """Returns the cached response to the request like get, without counting a hit or miss."""
+
+        key = (kind, self._normalize_file_name(file_name), line, column)
+        if key in self._responses:
+            return list(self._responses[key])
+
+        if self._persisted_responses:
+            response = self._get_persisted_response(*key)
+            if response is not None:
+                self._responses[key] = response
+                self.persisted_hits += 1
+                return list(response)
+
+        return None
+
+    def put(self, kind: str, file_name: str, line: int, column: int, response: list):
+        """Stores the response of the language server, a list of (line, column, uri) tuples, to the request."""
+
+        self._responses[(kind, self._normalize_file_name(file_name), line, column)] = list(response)
+
+    def load(self, cache_file_path: str, root_path: str, files: list[str]):
+        """Loads the responses saved in cache_file_path for the files under root_path.
+
+        Args:
+            cache_file_path (str): Path of the cache file. Nothing is loaded if it does not exist.
+            root_path (str): Root path of the files, that the language server resolves file names against.
+            files (list[str]): Paths of all files of the run. References are only reused if none of them changed.
+        """
+        self.root_path = root_path
+        self._project_files = files
+        self._persisted_responses = self._read(cache_file_path)
+
+    def save(self, cache_file_path: str):
+        """Adds the responses of this run to cache_file_path, keeping the responses saved for other files or projects."""
+
+        if self.root_path is None:
+            return
+        # Read the file again, other runs may have saved their responses since it was loaded.
+        responses = self._read(cache_file_path)
+        for (kind, file_name, line, column), response in self._responses.items():
+            file_hash = self._get_file_hash(file_name)
+            if file_hash is None:
+                continue
+            dependencies = self._get_dependencies(kind, response)
+            if dependencies is None:
+                continue
+            responses[(kind, file_hash, line, column)] = ([self._relativize(location) for location in response], dependencies)
+
+        # Write to a temporary file first, so an interrupted run never leaves a truncated cache behind.
+        os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(cache_file_path), suffix=".tmp")
+        with os.fdopen(file_descriptor, 'wb') as f:
+            pickle.dump((CACHE_FORMAT_VERSION, responses), f)
+        os.replace(temporary_path, cache_file_path)
+
+    def _read(self, cache_file_path: str) -> dict:
+        """Returns the responses saved in cache_file_path, or an empty dict if it does not exist or can not be read."""
+
+        if not os.path.isfile(cache_file_path):
+            return {}
+        try:
+            with open(cache_file_path, 'rb') as f:
+                version, responses = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+            print(f"Ignoring unreadable language server cache {cache_file_path}: {e}")
+            return {}
+        return responses if version == CACHE_FORMAT_VERSION else {}
+
+    def _get_persisted_response(self, kind: str, file_name: str, line: int, column: int) -> list:
+        """Returns the loaded response to the request if the files it depends on did not change, otherwise None."""
+
+        file_hash = self._get_file_hash(file_name)
+        if file_hash is None or (kind, file_hash, line, column) not in self._persisted_responses:
+            return None
+        stored_response, dependencies = self._persisted_responses[(kind, file_hash, line, column)]
+        for dependency, dependency_hash in dependencies.items():
+            current_hash = self._get_project_hash() if dependency is None else self._get_file_hash(dependency)
+            if current_hash != dependency_hash:
+                return None
+        return [self._absolutize(location) for location in stored_response]
+
+    def _get_dependencies(self, kind: str, response: list) -> dict:
+        """Returns the content hashes of the files the response depends on, keyed by file name. None is the key of the hash of all files.
+
+        Returns None if the response can not be validated later.
+        """
+        dependencies = {}
+        if kind == "definition":
+            for _, _, uri in response:
+                file_name = self._get_file_name_under_root(uri)
+                if file_name is None:
+                    continue
+                file_hash = self._get_file_hash(file_name)
+                if file_hash is None:
+                    return None
+                dependencies[file_name] = file_hash
+        # Nothing but the files of the run tells whether references, or a definition outside of the input, changed.
+        if not dependencies:
+            project_hash = self._get_project_hash()
+            return None if project_hash is None else {None: project_hash}
+        return dependencies
+
+    def _normalize_file_name(self, file_name: str) -> str:
+        """Returns the file name relative to the root path, the language server accepts both relative and absolute file names."""
+
+        if self.root_path and os.path.isabs(file_name) and file_name.startswith(self.root_path + os.sep):
+            return file_name[len(self.root_path) + 1:]
+        return file_name
+
+    def _get_file_name_under_root(self, uri: str) -> str:
+        """Returns the file name relative to the root path of a file:// uri under the root path, otherwise None."""
+
+        if self.root_path and uri.startswith("file://" + self.root_path + os.sep):
+            return uri[len("file://" + self.root_path) + 1:]
+        return None
+
+    def _relativize(self, location: tuple) -> tuple:
+        """Returns the location with its uri relative to the root path, if it is under the root path."""
+
+        line, column, uri = location
+        file_name = self._get_file_name_under_root(uri)
+        return (line, column, uri) if file_name is None else (line, column, None, file_name)
+
+    def _absolutize(self, stored_location: tuple) -> tuple:
+        """Returns the location stored by _relativize with an absolute uri."""
+
+        if len(stored_location) == 3:
+            return stored_location
+        line, column, _, file_name = stored_location
+        return (line, column, "file://" + os.path.join(self.root_path, file_name))
+
+    def _get_file_hash(self, file_name: str) -> str:
+        """Returns the sha256 of the content of the file, or None if it can not be read."""
+
+        if file_name not in self._file_hashes:
+            try:
+                with open(os.path.join(self.root_path, file_name), 'rb') as f:
+                    self._file_hashes[file_name] = hashlib.sha256(f.read()).hexdigest()
+            except (OSError, TypeError):
+                self._file_hashes[file_name] = None
+        return self._file_hashes[file_name]
+
+    def _get_project_hash(self) -> str:
+        """Returns a hash of the names and contents of all files of the run."""
+
+        if self._project_hash is None:
+            hasher = hashlib.sha256()
+            for file_name in sorted(self._normalize_file_name(file_path) for file_path in self._project_files):
+                file_hash = self._get_file_hash(file_name)
+                if file_hash is None:
+                    return None
+                hasher.update(f"{file_name}\0{file_hash}\0".encode('utf-8'))
+            self._project_hash = hasher.hexdigest()
+        return self._project_hash
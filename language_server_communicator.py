@@ -1,3 +1,5 @@
+from language_server_cache import LanguageServerCache
+
 class LanguageServerCommunicator:
 
     """ Communicates with a language server to request references and definitions of symbols in a source code file."""
@@ -6,6 +8,12 @@ class LanguageServerCommunicator:
         """ Initialize the LanguageServerCommunicator with a LanguageServerProtocol object."""
         
         self.lsp = lsp
+        # Responses of the language server, so the same position is only requested once.
+        self.language_server_cache = LanguageServerCache(getattr(lsp, "repository_root_path", None))
+        # Requests that were not in the cache while requests are recorded, see start_recording_requests.
+        self._recorded_requests = None
+        # Requests that listeners did not send because their response could not produce an edge.
+        self.skipped_requests = 0
 
     def _construct_language_server_input(self, ctx):
         """ Construct the input to the language server from an ANTLR context object."""
@@ -28,34 +36,57 @@ class LanguageServerCommunicator:
 
         return [self._process_language_server_output(result) for result in results]
     
+    def _request(self, kind, file_name, line, column):
+        """ Request the definition or references of the symbol at the given file, line, and column, answering repeated requests from the cache."""
+
+        if self._recorded_requests is not None:
+            result = self.language_server_cache.lookup(kind, file_name, line, column)
+            if result is None:
+                self._recorded_requests[(kind, file_name, line, column)] = None
+                return []
+            return result
+
+        result = self.language_server_cache.get(kind, file_name, line, column)
+        if result is None:
+            if kind == "definition":
+                result = self._process_language_server_outputs(self.lsp.request_definition(file_name, line, column))
+            else:
+                result = self._process_language_server_outputs(self.lsp.request_references(file_name, line, column))
+            self.language_server_cache.put(kind, file_name, line, column, result)
+        return result
+
+    def add_language_server_response(self, kind, file_name, line, column, response):
+        """ Cache a response of the language server to a request that was sent on behalf of this communicator, e.g. by LanguageServerPipeline."""
+
+        self.language_server_cache.put(kind, file_name, line, column, self._process_language_server_outputs(response))
+
+    def start_recording_requests(self):
+        """ Record the requests that are not in the cache instead of sending them to the language server, which then returns no result."""
+
+        self._recorded_requests = {}
+
+    def stop_recording_requests(self):
+        """ Stop recording requests and get the recorded (kind, file_name, line, column) requests, in the order they were made."""
+
+        recorded_requests, self._recorded_requests = self._recorded_requests, None
+        return list(recorded_requests)
+
     def request_references_from_ctx(self, ctx):
         """ Request references of the symbol at the given context from the language server."""
 
-        result = self.lsp.request_references(
-            *self._construct_language_server_input(ctx)
-        )
-        return self._process_language_server_outputs(result)
+        return self._request("references", *self._construct_language_server_input(ctx))
     
     def request_definition_from_ctx(self, ctx):
         """ Request the definition of the symbol at the given context from the language server."""
 
-        result = self.lsp.request_definition(
-            *self._construct_language_server_input(ctx)
-        )
-        return self._process_language_server_outputs(result)
+        return self._request("definition", *self._construct_language_server_input(ctx))
     
     def request_references_from_file_line_column(self, file_name, line, column):
         """ Request references of the symbol at the given file, line, and column from the language server."""
 
-        result = self.lsp.request_references(
-            file_name, line, column
-        )
-        return self._process_language_server_outputs(result)
+        return self._request("references", file_name, line, column)
 
     def request_definition_from_file_line_column(self, file_name, line, column):
         """ Request the definition of the symbol at the given file, line, and column from the language server."""
 
-        result = self.lsp.request_definition(
-            file_name, line, column
-        )
-        return self._process_language_server_outputs(result)
\ No newline at end of file
+        return self._request("definition", file_name, line, column)
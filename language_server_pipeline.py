@@ -0,0 +1,56 @@
+import asyncio
+from two_phase_parse_tree_walker import TwoPhaseParseTreeWalker
+from owl_constructor import OWLConstructor
+from asbstract_syntax_tree import AST
+
+class LanguageServerPipeline():
+    """Sends the language server requests that the regular phase needs for a file concurrently, before the file is walked.
+
+    A dry walk of the file records the requests that are not cached yet. They are sent to the asynchronous language server
+    that multilspy's SyncLanguageServer wraps, with at most max_in_flight requests in flight, and the responses are cached.
+    Some requests only follow from earlier responses, so this is repeated up to max_rounds times.
+    The regular walk then finds its responses in the cache and only waits for requests that could not be foreseen.
+    """
+
+    def __init__(self, lsp, max_in_flight: int, max_rounds: int = 3):
+        """Initializes the pipeline for the started SyncLanguageServer lsp."""
+
+        self.lsp = lsp
+        self.max_in_flight = max_in_flight
+        self.max_rounds = max_rounds
+        # Number of requests that were sent ahead of the regular walks.
+        self.prefetched_requests = 0
+
+    def prefetch(self, walker: TwoPhaseParseTreeWalker, listener: OWLConstructor, ast: AST):
+        """Sends the language server requests that the regular walk of ast will make and caches the responses."""
+
+        for _ in range(self.max_rounds):
+            try:
+                requests = walker.recordingWalk(listener, ast)
+            except Exception as e:
+                # The regular walk makes the requests one by one instead.
+                print(f"Could not collect the language server requests for file {ast.file_path} in advance: {e}")
+                return
+            if not requests:
+                return
+
+            responses = asyncio.run_coroutine_threadsafe(self._send_requests(requests), self.lsp.loop).result()
+            for request, response in zip(requests, responses):
+                # Failed requests are sent again by the regular walk, which reports the error.
+                if not isinstance(response, BaseException):
+                    listener.add_language_server_response(*request, response)
+                    self.prefetched_requests += 1
+
+    async def _send_requests(self, requests: list) -> list:
+        """Sends the (kind, file_name, line, column) requests concurrently and returns the responses, or the exceptions they raised."""
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        language_server = self.lsp.language_server
+
+        async def send_request(kind, file_name, line, column):
+            async with semaphore:
+                if kind == "definition":
+                    return await language_server.request_definition(file_name, line, column)
+                return await language_server.request_references(file_name, line, column)
+
+        return await asyncio.gather(*(send_request(*request) for request in requests), return_exceptions=True)
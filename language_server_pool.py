@@ -0,0 +1,79 @@
+import os
+import hashlib
+import contextlib
+from pathlib import Path
+from supported_language import SupportedLanguage
+from rdf_creation import create_language_server
+
+# Types of the file events of a workspace/didChangeWatchedFiles notification of the Language Server Protocol.
+FILE_CREATED, FILE_CHANGED, FILE_DELETED = 1, 2, 3
+
+class LanguageServerPool():
+    """Keeps one started language server per language for the conversions of a long-running process, see ConversionServer.
+
+    Starting jdtls or clangd and letting it import and index a project takes longer than converting a small one.
+    The language servers of the pool stay bound to one workspace folder that every conversion copies or extracts its input to.
+    Before a language server is used for the next conversion, it is told which files were created, changed or deleted since
+    the conversion it was last used for, with a workspace/didChangeWatchedFiles notification, so it only indexes those again.
+    """
+
+    def __init__(self, root_path: str):
+        """Initializes the pool for the workspace folder root_path. The language servers are started on first use."""
+
+        self.root_path = root_path
+        self._exit_stack = contextlib.ExitStack()
+        self._language_servers = {}
+        # SHA-256 digest of the content of each file in the workspace, by URI, when the language server of each language was last used.
+        self._file_digests = {}
+
+    def get(self, language: SupportedLanguage):
+        """Returns the started language server of language, after telling it about the files that changed since it was last used."""
+
+        file_digests = self._get_file_digests()
+        lsp = self._language_servers.get(language.name)
+        if lsp is None:
+            lsp = create_language_server(language, self.root_path)
+            self._exit_stack.enter_context(lsp.start_server())
+            self._language_servers[language.name] = lsp
+        else:
+            changes = self._get_changes(self._file_digests[language.name], file_digests)
+            if changes:
+                print(f"Notifying the language server for {language.name} of {len(changes)} changed files.")
+                # Notifications are sent from the event loop of the language server, like its requests.
+                lsp.loop.call_soon_threadsafe(lsp.language_server.server.notify.did_change_watched_files, {"changes": changes})
+        self._file_digests[language.name] = file_digests
+        return lsp
+
+    def close(self):
+        """Stops the language servers. The pool starts them again if it is used afterwards."""
+
+        try:
+            self._exit_stack.close()
+        finally:
+            self._exit_stack = contextlib.ExitStack()
+            self._language_servers, self._file_digests = {}, {}
+
+    def _get_file_digests(self) -> dict:
+        """Returns the SHA-256 digest of the content of each file in the workspace folder, by URI."""
+
+        file_digests = {}
+        for root, _, filenames in os.walk(self.root_path):
+            for filename in filenames:
+                file_path = os.path.join(root, filename)
+                with open(file_path, 'rb') as f:
+                    file_digests[Path(file_path).as_uri()] = hashlib.sha256(f.read()).digest()
+        return file_digests
+
+    @staticmethod
+    def _get_changes(previous_file_digests: dict, file_digests: dict) -> list[dict]:
+        """Returns the FileEvents of the files that were created, changed or deleted between the two states of the workspace."""
+
+        changes = []
+        for uri in sorted(previous_file_digests.keys() | file_digests.keys()):
+            if uri not in file_digests:
+                changes.append({"uri": uri, "type": FILE_DELETED})
+            elif uri not in previous_file_digests:
+                changes.append({"uri": uri, "type": FILE_CREATED})
+            elif previous_file_digests[uri] != file_digests[uri]:
+                changes.append({"uri": uri, "type": FILE_CHANGED})
+        return changes
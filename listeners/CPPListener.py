@@ -1,3 +1,4 @@
+from antlr_generated_code.cpp.CPP14Parser import CPP14Parser
 from antlr_generated_code.cpp.CPP14ParserListener import CPP14ParserListener
 from listeners.base.CPPListenerBase import CPPListenerBase
 
@@ -18,16 +19,16 @@ class CPPListener(CPP14ParserListener, CPPListenerBase):
 
         self.create_node_for_current_file(ctx)
         self.modifierNestings = ["public"]
+        if self.initializationPhase:
+            self.register_header_file(self.filename_from_ctx(ctx))
         # Only .cpp files can implement interfaces
-        if ".cpp_" in self.currentFileInstance:
-            for line in range (0, ctx.start.line + 1):
-                refferenced_files = self.get_instances_where_file_is_defined(line, 0, self.filename_from_ctx(ctx), self.currentFileInstance)
-                for refferenced_file in refferenced_files:
-                    # only .h/hpp files can be interfaces
-                    if ".h_" in refferenced_file or ".hpp_" in refferenced_file:
-                        # Add 'implementsInterface' and 'isImplementedBy' edge to the needed files.
-                        self.create_OWL_object_property_instance(self.currentFileInstance, refferenced_file, "implementsInterface")
-                        self.create_OWL_object_property_instance(refferenced_file, self.currentFileInstance, "isImplementedBy")
+        elif ".cpp_" in self.currentFileInstance:
+            # Only the include directives before the first declaration are considered, the language server used to be asked about those lines.
+            # Only .h/.hpp files can be interfaces
+            for refferenced_file in self.get_included_header_file_instances(self.filename_from_ctx(ctx), ctx.start.line):
+                # Add 'implementsInterface' and 'isImplementedBy' edge to the needed files.
+                self.create_OWL_object_property_instance(self.currentFileInstance, refferenced_file, "implementsInterface")
+                self.create_OWL_object_property_instance(refferenced_file, self.currentFileInstance, "isImplementedBy")
 
     def enterNamespaceDefinition(self, ctx):
         """ Create a node of type "Namespace" for each namespace in the source code."""
@@ -174,10 +175,7 @@ class CPPListener(CPP14ParserListener, CPPListenerBase):
                         self.create_OWL_object_property_instance(class_instance, instance, "declaresConstructor")
 
                     # Find the refferences of the constructor
-                    reffereced_instances = self.get_instances_where_field_method_constructor_instance_is_refferenced(ctx.declarator().pointerDeclarator().noPointerDeclarator().noPointerDeclarator())
-                    if reffereced_instances:
-                        for reffereced_instance in reffereced_instances:
-                            self.constructorDictionary[reffereced_instance] = instance
+                    self.collect_constructor_references(ctx.declarator().pointerDeclarator().noPointerDeclarator().noPointerDeclarator(), instance)
         if instance:
             # Keep track of the current function
             self.setCurrentMethodInstance(instance)
@@ -369,6 +367,10 @@ class CPPListener(CPP14ParserListener, CPPListenerBase):
             accessed_name = ctx.idExpression()
             if accessed_name:
                 accessed_name = accessed_name.getText()
+                # Only ask the language server about names that can resolve to a field or method of the codebase.
+                if not self.initializationPhase and not self.is_possible_member_access_target(accessed_name):
+                    self.skipped_requests += 1
+                    return
                 refferenced_instance = self.get_instance_from_lsp_definition(ctx.idExpression(), accessed_name)
                 if refferenced_instance:
                     reffered_node_type = self.get_resource_from_instance(refferenced_instance)
@@ -460,4 +462,14 @@ class CPPListener(CPP14ParserListener, CPPListenerBase):
         if len(self.modifierNestings) > 0:
             self.modifierNestings.pop()
         if len(self.methodNestings) > 0:
-            self.methodNestings.pop()
\ No newline at end of file
+            self.methodNestings.pop()
+
+    """ OWLConstructor Overrides """
+
+    def collect_declaration_references(self, ctx):
+        """ Collect the references to a constructor like enterFunctionDefinition does."""
+
+        if isinstance(ctx, CPP14Parser.FunctionDefinitionContext) and not ctx.declSpecifierSeq():
+            constructor_name_ctx = ctx.declarator().pointerDeclarator().noPointerDeclarator().noPointerDeclarator()
+            if constructor_name_ctx:
+                self.collect_constructor_references(constructor_name_ctx, self.create_OWL_class_instance(constructor_name_ctx, "Constructor", constructor_name_ctx.getText()))
@@ -1,3 +1,4 @@
+from antlr_generated_code.java.JavaParser import JavaParser
 from antlr_generated_code.java.JavaParserListener import JavaParserListener
 from listeners.base.JavaListenerBase import JavaListenerBase
 
@@ -27,6 +28,7 @@ class JavaListener(JavaParserListener, JavaListenerBase):
         if not instance:
             instance = self.create_OWL_class_instance(ctx, "JavaPackage", package_name)
             self.create_OWL_data_property_instance(instance, "hasCodeIdentifier", package_name)
+            self.add_package_to_trie(package_name, instance)
 
         self.currentPackageName = package_name
 
@@ -127,10 +129,7 @@ class JavaListener(JavaParserListener, JavaListenerBase):
             self.create_OWL_object_property_instance(instance, current_complex_type_instance, "isDeclaredConstructorOf")
 
         # Find the refferences of the constructor
-        reffereced_instances = self.get_instances_where_field_method_constructor_instance_is_refferenced(ctx.identifier())
-        if reffereced_instances:
-            for reffereced_instance in reffereced_instances:
-                self.constructorDictionary[reffereced_instance] = instance
+        self.collect_constructor_references(ctx.identifier(), instance)
 
         constructor_body_block_context = ctx.block()
         if constructor_body_block_context:
@@ -156,13 +155,7 @@ class JavaListener(JavaParserListener, JavaListenerBase):
             self.create_OWL_object_property_instance(instance, current_complex_type_instance, "isDeclaredFieldOf")
 
         # Find the refferences of the field.
-        field_name_ctx.start.column += 1
-        reffereced_locations = self.get_locations_where_field_method_constructor_instance_is_referenced(field_name_ctx)
-        if reffereced_locations:
-            for reffereced_location in reffereced_locations:
-                if not instance in self.fieldsDictionary:
-                    self.fieldsDictionary[instance] = []
-                self.fieldsDictionary[instance].append(reffereced_location)
+        self.collect_field_references(field_name_ctx, instance)
 
         self.sharedVariableEnterConfig(ctx, instance)
 
@@ -313,3 +306,14 @@ class JavaListener(JavaParserListener, JavaListenerBase):
         """ Reset the modifiersForNextThingToBeEncountered variable."""
 
         self.modifiersForNextThingToBeEncountered = []
+
+    """ OWLConstructor Overrides """
+
+    def collect_declaration_references(self, ctx):
+        """ Collect the references to a field or a constructor like enterFieldDeclaration and enterConstructorDeclaration do."""
+
+        if isinstance(ctx, JavaParser.FieldDeclarationContext):
+            field_name_ctx = ctx.variableDeclarators().variableDeclarator(0).variableDeclaratorId()
+            self.collect_field_references(field_name_ctx, self.create_OWL_class_instance(ctx, "Field", field_name_ctx.getText()))
+        elif isinstance(ctx, JavaParser.ConstructorDeclarationContext):
+            self.collect_constructor_references(ctx.identifier(), self.create_OWL_class_instance(ctx, "Constructor", ctx.identifier().getText()))
@@ -1,3 +1,6 @@
+import os
+import re
+from rdflib import Literal
 from owl_constructor import OWLConstructor
 
 class CPPListenerBase(OWLConstructor):
@@ -8,10 +11,26 @@ class CPPListenerBase(OWLConstructor):
     
     """
 
-    accessModifierInstances, constructorDictionary = {}, {}
-
-    def __init__(self, lsp):
-        super().__init__(lsp)
+    # The access modifiers and the header files are only set up in the initialization phase, the constructors undo their changes themselves.
+    _attributes_excluded_from_walk_state = OWLConstructor._attributes_excluded_from_walk_state + ("accessModifierInstances", "headerFileInstances", "headerFilesByName", "constructorDictionary")
+    # The regular walks look up the invocations of constructors declared in other files.
+    referencedDeclarationClassNames = ("Constructor",)
+    # Matches '#include "file"' and '#include <file>' directives, capturing the opening delimiter and the included path.
+    includeDirectivePattern = re.compile(r'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\n]+)[>"]', re.MULTILINE)
+    headerFileExtensions = (".h", ".hpp")
+
+    def __init__(self, lsp, graph = None, compact_ids = False, root_path = None):
+        super().__init__(lsp, graph, compact_ids, root_path)
+        self.accessModifierInstances, self.constructorDictionary = {}, {}
+        # Lists of ComplexTypeState, NamespaceState, MethodState and access modifiers to keep track of nested declarations.
+        self.complexTypeNestings = []
+        self.namespaceNestings = []
+        self.methodNestings = []
+        self.modifierNestings = ["public"]
+        # Absolute path of each parsed header file -> its file instance, collected in the initialization phase.
+        self.headerFileInstances = {}
+        # File name of each parsed header file -> the absolute paths of the header files with that name.
+        self.headerFilesByName = {}
 
         # Set up language specific stuff.
         primitiveTypes = ["int", "short", "long", "long long", "unsigned int", "unsigned short", "unsigned long",
@@ -21,12 +40,12 @@ class CPPListenerBase(OWLConstructor):
         for primitive in primitiveTypes:
             # replacing every space with an underscore so it can be serialized
             primitive = primitive.replace(" ", "_")
-            instance = self.create_OWL_class_instance(None, "PrimitiveType", primitive)
+            instance = self.create_built_in_OWL_class_instance("PrimitiveType", primitive)
             self.create_OWL_data_property_instance(instance, "hasCodeIdentifier", primitive)
 
         # Define a node for each access modifier:
         for access_modifier in ["private", "protected", "public"]:
-            instance = self.create_OWL_class_instance(None, "AccessModifier", access_modifier)
+            instance = self.create_built_in_OWL_class_instance("AccessModifier", access_modifier)
             self.create_OWL_data_property_instance(instance, "hasCodeIdentifier", access_modifier)
             self.accessModifierInstances[access_modifier] = instance
 
@@ -57,12 +76,6 @@ class CPPListenerBase(OWLConstructor):
 
             self.instance = instance
 
-    # List of ComplexTypeState and namespace to keep track of nested type declarations.
-    complexTypeNestings = []
-    namespaceNestings = []
-    methodNestings = []
-    modifierNestings = ["public"]
-
     def getCurrentComplexTypeInstance(self):
         """ Get the current complex type instance. """
 
@@ -124,6 +137,89 @@ class CPPListenerBase(OWLConstructor):
 
         self.methodNestings.append(self.MethodState(instance))
         
+    """ Things related to include directives """
+
+    def register_header_file(self, file_path):
+        """ Remember the instance of the current file if it is a header file, so include directives can be resolved to it. """
+
+        if os.path.splitext(file_path)[1] in self.headerFileExtensions:
+            header_path = os.path.abspath(file_path)
+            if header_path not in self.headerFileInstances:
+                self.headerFilesByName.setdefault(os.path.basename(header_path), []).append(header_path)
+            self.headerFileInstances[header_path] = self.currentFileInstance
+
+    def add_file_fragment(self, file_path, fragment):
+        """ Add the fragment of the file like OWLConstructor does, and remember the file if it is a header file."""
+
+        if not super().add_file_fragment(file_path, fragment):
+            return False
+        self.register_header_file(file_path)
+        return True
+
+    def get_included_header_file_instances(self, file_path, last_line):
+        """ Get the instances of the parsed header files that the file includes before line last_line (0-based).
+
+        The directives are read with a lexical pass over the file instead of asking the language server for each line.
+        A quoted include is first resolved relative to the directory of the including file, like the preprocessor does.
+        Otherwise the include is resolved to the parsed header file whose path ends with the included path, if there is exactly one.
+        An include that several header files match is left unresolved, as the include paths of the build decide between them.
+        """
+
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError):
+            return []
+
+        included_instances = []
+        for match in self.includeDirectivePattern.finditer(source):
+            if source.count("\n", 0, match.start()) > last_line:
+                break
+            delimiter, included_path = match.group(1), match.group(2).strip()
+            candidates = []
+            if delimiter == '"':
+                relative_path = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(file_path)), included_path))
+                if relative_path in self.headerFileInstances:
+                    candidates = [relative_path]
+            if not candidates:
+                suffix = os.sep + os.path.normpath(included_path)
+                candidates = [header_path for header_path in self.headerFilesByName.get(os.path.basename(suffix), []) if header_path.endswith(suffix)]
+                if len(candidates) > 1:
+                    candidates = []
+            for header_path in candidates:
+                instance = self.headerFileInstances[header_path]
+                if instance not in included_instances and instance != self.currentFileInstance:
+                    included_instances.append(instance)
+        return included_instances
+
+    """ Things related to member accesses """
+
+    def is_possible_member_access_target(self, member_name):
+        """ Check whether a member access of member_name can resolve to a node that enterPostfixExpression creates edges for.
+
+        Those are the fields and methods of the codebase, which the initialization phase created nodes for.
+        Names without such a node, e.g. members of standard library types, do not need to be sent to the language server.
+        """
+
+        member_name = self._clean_instance_name(member_name)
+        for instance in self._g.get_subjects(self._SEON_code.hasCodeIdentifier, Literal(str(member_name))):
+            node_type = self.get_resource_from_instance(instance)
+            if not node_type:
+                continue
+            if "Method" in node_type or "Field" in node_type:
+                return True
+            if self.get_attribute_instance_from_instance(instance, "isDeclaredFieldOf") or self.get_attribute_instance_from_instance(instance, "isDeclaredMethodOf"):
+                return True
+        return False
+
+    """ Things related to references to constructors """
+
+    def collect_constructor_references(self, constructor_name_ctx, constructor_instance):
+        """ Ask the language server where the constructor is referenced, and map the IDs of the nodes at these locations to the constructor."""
+
+        for referenced_instance in self.get_instances_where_field_method_constructor_instance_is_refferenced(constructor_name_ctx):
+            self.set_walk_index_item(self.constructorDictionary, referenced_instance, constructor_instance)
+
     """ Methods for shared functionality """
 
     def sharedClassEnumEnterConfig(self, node_class, node_name, ctx, instance):
@@ -1,3 +1,5 @@
+from bisect import bisect_left, bisect_right, insort
+from rdflib import RDF
 from owl_constructor import OWLConstructor
 
 class JavaListenerBase(OWLConstructor):
@@ -8,13 +10,24 @@ class JavaListenerBase(OWLConstructor):
     
     """
 
-    accessModifierInstances, constructorDictionary = {}, {}
-    currentPackageName = None 
-    modifiersForNextThingToBeEncountered = []
-    fieldsDictionary = {}
-    
-    def __init__(self, lsp):
-        super().__init__(lsp)
+    # The access modifiers and the package trie are only set up in the initialization phase, the other indexes undo their changes themselves.
+    _attributes_excluded_from_walk_state = OWLConstructor._attributes_excluded_from_walk_state + ("accessModifierInstances", "packageTrie", "constructorDictionary", "fieldReferencesByFile", "fieldNumbers")
+    # The regular walks look up the accesses of fields and the invocations of constructors declared in other files.
+    referencedDeclarationClassNames = ("Field", "Constructor")
+
+    def __init__(self, lsp, graph = None, compact_ids = False, root_path = None):
+        super().__init__(lsp, graph, compact_ids, root_path)
+        self.accessModifierInstances, self.constructorDictionary = {}, {}
+        self.currentPackageName = None
+        self.modifiersForNextThingToBeEncountered = []
+        # List of ComplexTypeState to keep track of nested type declarations.
+        self.complexTypeNestings = []
+        # File name -> sorted list of (line, column, field number, reference number, field instance) of the references to fields in that file.
+        self.fieldReferencesByFile = {}
+        # Trie of the packages by the parts of their names: name part -> PackageTrieNode.
+        self.packageTrie = {}
+        # Field instance -> [field number, number of references added], fields are numbered in the order in which their references were first added.
+        self.fieldNumbers = {}
 
         # Set up language specific stuff.
         self.set_OWL_language_specifics("SEON_java", "http://se-on.org/ontologies/system-specific/2012/02/java.owl#", ["JavaPackage"], [], ["hasJavaDoc"])
@@ -22,12 +35,12 @@ class JavaListenerBase(OWLConstructor):
         # Define a node for each primitive type:
         primitiveTypes = ["byte", "char", "short", "int", "long", "float", "double", "boolean"]
         for primitive in primitiveTypes:
-            instance = self.create_OWL_class_instance(None, "PrimitiveType", primitive)
+            instance = self.create_built_in_OWL_class_instance("PrimitiveType", primitive)
             self.create_OWL_data_property_instance(instance, "hasCodeIdentifier", primitive)
 
         # Define a node for each access modifier:
         for access_modifier in ["default", "private", "protected", "public"]:
-            instance = self.create_OWL_class_instance(None, "AccessModifier", access_modifier)
+            instance = self.create_built_in_OWL_class_instance("AccessModifier", access_modifier)
             self.create_OWL_data_property_instance(instance, "hasCodeIdentifier", access_modifier)
             self.accessModifierInstances[access_modifier] = instance
 
@@ -55,9 +68,6 @@ class JavaListenerBase(OWLConstructor):
             return func(self, *args, **kwargs)
         return wrapper
 
-    # List of ComplexTypeState to keep track of nested type declarations.
-    complexTypeNestings = []
-
     @requireComplexTypeNestings
     def getCurrentMethodInstance(self):
         """ Get the current method instance."""
@@ -88,6 +98,120 @@ class JavaListenerBase(OWLConstructor):
 
         self.complexTypeNestings[-1].currentMethodInstance = instance
 
+    """ Things related to package nesting """
+
+    class PackageTrieNode():
+        """ Class that represents a part of a package name in the trie of packages."""
+
+        def __init__(self):
+            """ Set the package instance, if a package has this name, and the nodes of the next name parts."""
+
+            self.instance = None
+            self.children = {}
+
+    def add_package_to_trie(self, package_name, instance):
+        """ Add the package to the trie of packages, which get_graph uses to find the packages that are nested in each other."""
+
+        children = self.packageTrie
+        for name_part in package_name.split("."):
+            node = children.setdefault(name_part, self.PackageTrieNode())
+            children = node.children
+        node.instance = instance
+
+    def get_nested_package_pairs(self):
+        """ Get (parent package instance, child package instance) pairs from the trie of packages.
+
+        The parent of a package is the package with the longest name that its name starts with, e.g. 'a' for 'a.b.c' if there is no package 'a.b'.
+        """
+
+        pairs = []
+        # Nodes to visit, with the instance of the closest package above them.
+        stack = [(node, None) for node in self.packageTrie.values()]
+        while stack:
+            node, parent_instance = stack.pop()
+            if node.instance:
+                if parent_instance:
+                    pairs.append((parent_instance, node.instance))
+                parent_instance = node.instance
+            stack.extend((child, parent_instance) for child in node.children.values())
+        return pairs
+
+    def add_file_fragment(self, file_path, fragment):
+        """ Add the fragment of the file like OWLConstructor does, and restore the packages and current package name its walk left behind."""
+
+        if not super().add_file_fragment(file_path, fragment):
+            return False
+        package_class = self._OWL_classes["JavaPackage"]
+        package_instances = {s for s, p, o in fragment.triples if p == RDF.type and o == package_class}
+        for s, p, o in fragment.triples:
+            if s in package_instances and p == self._OWL_data_properties["hasCodeIdentifier"]:
+                self.add_package_to_trie(str(o), s)
+        # The walk looks up the package of the file whenever it needs it, the last lookup is the package name the walk ended with.
+        package_names = [arguments[0] for _, arguments, _ in fragment.lookups if arguments[1] == "JavaPackage"]
+        if package_names:
+            self.currentPackageName = package_names[-1]
+        return True
+
+    """ Things related to references to fields and constructors """
+
+    def collect_field_references(self, field_name_ctx, field_instance):
+        """ Ask the language server where the field is referenced, and add these locations to the per file index of field references."""
+
+        # The language server is asked about the second character of the name. The token is moved back, as it is walked again.
+        field_name_ctx.start.column += 1
+        referenced_locations = self.get_locations_where_field_method_constructor_instance_is_referenced(field_name_ctx)
+        field_name_ctx.start.column -= 1
+        if referenced_locations:
+            self.add_field_references(field_instance, referenced_locations)
+
+    def collect_constructor_references(self, constructor_name_ctx, constructor_instance):
+        """ Ask the language server where the constructor is referenced, and map the IDs of the nodes at these locations to the constructor."""
+
+        for referenced_instance in self.get_instances_where_field_method_constructor_instance_is_refferenced(constructor_name_ctx):
+            self.set_walk_index_item(self.constructorDictionary, referenced_instance, constructor_instance)
+
+    def add_field_references(self, field_instance, referenced_locations):
+        """ Add the (file name, line, column) locations where the field is referenced to the per file index of field references."""
+
+        if field_instance not in self.fieldNumbers:
+            self.set_walk_index_item(self.fieldNumbers, field_instance, [len(self.fieldNumbers), 0])
+        field_numbers = self.fieldNumbers[field_instance]
+        reference_count = field_numbers[1]
+        self.record_walk_undo(lambda: field_numbers.__setitem__(1, reference_count))
+        for file_name, line, column in referenced_locations:
+            if file_name not in self.fieldReferencesByFile:
+                self.set_walk_index_item(self.fieldReferencesByFile, file_name, [])
+            references = self.fieldReferencesByFile[file_name]
+            reference = (line, column, field_numbers[0], field_numbers[1], field_instance)
+            insort(references, reference)
+            self.record_walk_undo(lambda references=references, reference=reference: references.remove(reference))
+            field_numbers[1] += 1
+
+    def pop_field_references_in_span(self, file_name, start, stop):
+        """ Remove and return the first reference to each field between the start and stop tokens in the file.
+
+        The fields are returned in the order in which their references were first added.
+        Only the references in the span are visited, found by binary search in the sorted references of the file.
+        """
+
+        references = self.fieldReferencesByFile.get(file_name)
+        if not references:
+            return []
+        low = bisect_left(references, (start.line, start.column))
+        high = bisect_right(references, (stop.line, stop.column, float("inf")))
+
+        first_references = {}
+        for reference in references[low:high]:
+            field_number, reference_number = reference[2], reference[3]
+            if field_number not in first_references or reference_number < first_references[field_number][3]:
+                first_references[field_number] = reference
+        popped_references = set(first_references.values())
+        span_references = references[low:high]
+        remaining_references = [reference for reference in span_references if reference not in popped_references]
+        references[low:high] = remaining_references
+        self.record_walk_undo(lambda: references.__setitem__(slice(low, low + len(remaining_references)), span_references))
+        return [first_references[field_number][4] for field_number in sorted(first_references)]
+
     """ OWLConstructor Overrides """
 
     def get_graph(self):
@@ -98,44 +222,12 @@ class JavaListenerBase(OWLConstructor):
         
         """
 
-        def create_package_pairs(package_list):
-            """ Helper function to create pairs of packages that are nested in each other."""
-
-            package_list_split = [package.split(".") for package in package_list]
-            pairs = []
-            while len(package_list_split) > 0:
-                # Get package with most elements
-                max_len_package = max(package_list_split, key=len)
-                if len(max_len_package) == 1:
-                    break
-                # Remove this package from the list
-                package_list_split.remove(max_len_package)
-                # Get the parent package
-                parent_package = max_len_package[:-1]
-                while len(parent_package) > 0:
-                    # Check if package with one element less is in the list.
-                    found = False
-                    for package in package_list_split:
-                        if parent_package == package:
-                            found = True
-                            break           
-                    if found: 
-                        break
-                    else:
-                        parent_package = parent_package[:-1]
-                if len(parent_package) > 0:
-                    pairs.append((".".join(parent_package), ".".join(max_len_package)))
-            return pairs
-
         # While parsing there is no guarantee that we will encounter package 'a.b.c' before or after 'a.b'.
         # Nor is there a guarantee that there will be a package 'a.b' if there is a package 'a.b.c' and 'a'.
         # Thus we must create edges between packages that are nested in each other after having parsed all packages.
-        package_instances = self.get_instances_from_code_identifier(None, class_name = "JavaPackage")
-        package_instance_name_pairs = {str(self.get_attribute_instance_from_instance(instance, "hasCodeIdentifier")): instance for instance in package_instances}
-        package_pairs = create_package_pairs(package_instance_name_pairs.keys())
-        for parent_package, child_package in package_pairs:
-            self.create_OWL_object_property_instance(package_instance_name_pairs[parent_package], package_instance_name_pairs[child_package], "hasNestedNamespaceMember")
-            self.create_OWL_object_property_instance(package_instance_name_pairs[child_package], package_instance_name_pairs[parent_package], "isNestedNamespaceIn")
+        for parent_package_instance, child_package_instance in self.get_nested_package_pairs():
+            self.create_OWL_object_property_instance(parent_package_instance, child_package_instance, "hasNestedNamespaceMember")
+            self.create_OWL_object_property_instance(child_package_instance, parent_package_instance, "isNestedNamespaceIn")
         return super().get_graph()
 
     """ Methods for shared functionality """
@@ -276,23 +368,14 @@ class JavaListenerBase(OWLConstructor):
         parseStatements(block_context.blockStatement())
 
         current_file_name = self.filename_from_ctx(ctx)
-        # "accessesField" and "isAccessedBy" edges.
-        for field_instance, referenced_locations in self.fieldsDictionary.items():
-            # Check if the referenced location is in this expression context.
-            for location in referenced_locations:
-                if current_file_name == location[0]:
-                    if ((location[1] > ctx.start.line and location[1] < ctx.stop.line) or
-                        (location[1] == ctx.start.line and location[1] == ctx.stop.line and location[2] >= ctx.start.column and location[2] <= ctx.stop.column) or
-                        (location[1] == ctx.start.line and location[1] < ctx.stop.line and location[2] >= ctx.start.column) or
-                        (location[1] > ctx.start.line and location[1] == ctx.stop.line and location[2] <= ctx.stop.column)):
-                        self.create_OWL_object_property_instance(instance, field_instance, "accessesField")
-                        self.create_OWL_object_property_instance(field_instance, instance, "isAccessedBy")
-                        # Add "usesComplexType" edge.
-                        used_complex_type = self.get_attribute_instance_from_instance(field_instance, "isDeclaredFieldOf")
-                        if used_complex_type and (current_complex_type_instance != used_complex_type):
-                            self.create_OWL_object_property_instance(current_complex_type_instance, used_complex_type, "usesComplexType")
-                        self.fieldsDictionary[field_instance].remove(location)
-                        break
+        # "accessesField" and "isAccessedBy" edges, for the first reference to each field in this method or constructor.
+        for field_instance in self.pop_field_references_in_span(current_file_name, ctx.start, ctx.stop):
+            self.create_OWL_object_property_instance(instance, field_instance, "accessesField")
+            self.create_OWL_object_property_instance(field_instance, instance, "isAccessedBy")
+            # Add "usesComplexType" edge.
+            used_complex_type = self.get_attribute_instance_from_instance(field_instance, "isDeclaredFieldOf")
+            if used_complex_type and (current_complex_type_instance != used_complex_type):
+                self.create_OWL_object_property_instance(current_complex_type_instance, used_complex_type, "usesComplexType")
 
         # Empty modifiersForNextThingToBeEncountered
         self.modifiersForNextThingToBeEncountered = []
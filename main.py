@@ -1,49 +1,63 @@
 import os
 import sys
+import time
 import shutil
+import argparse
+import contextlib
+import tempfile
+from rdflib import Graph, Dataset
 
 from rdf_creation import get_rdf
-from supported_language import SupportedLanguage, supported_languages
+from input_manifest import InputManifest
+from dfa_cache import DFACache, DEFAULT_DFA_CACHE_DIRECTORY
+from fragment_cache import FragmentCache, DEFAULT_FRAGMENT_CACHE_DIRECTORY
+from code_ontology import CodeOntology, ONTOLOGY_PATH_ENVIRONMENT_VARIABLE
+from language_server_cache import DEFAULT_LANGUAGE_SERVER_CACHE_DIRECTORY
+from language_server_pool import LanguageServerPool
+from ntriples_writer import NTriplesWriter
+from incremental_analysis import IncrementalAnalysis
+from supported_language import supported_languages
 
-INPUT_FOLDER_PATH = os.path.abspath('./input/')
-
-def get_files_for_language(directory_or_zip_path: str, language: SupportedLanguage) -> list[str]:
-    """Returns a list of the file paths of files of language [language] in the archive or directory.
+def parse_arguments(argv: list[str]) -> argparse.Namespace:
+    """Parses the provided CLI arguments.
 
     Args:
-        path (str): Path to the archive to be extracted or directory to be scanned.
-        language (SupportedLanguage): Language to filter files.
+        argv (list[str]): List of the provided CLI arguments, starting with the program name.
 
     Returns:
-        list[str]: List of file paths extracted from the archive or directory.
+        argparse.Namespace: The parsed arguments.
     """
-    # Initialize files list
-    files = []
-    
-    # Remove old input folder
-    if os.path.exists(INPUT_FOLDER_PATH):
-        shutil.rmtree(INPUT_FOLDER_PATH)
-    # Check if the path is correct:
-    if not os.path.exists(directory_or_zip_path):
-        raise Exception(f"Provided path does not exist: {directory_or_zip_path}")
-    # Check if path is a directory
-    elif os.path.isdir(directory_or_zip_path):
-        # Copy the files from the directory to INPUT_FOLDER_PATH
-        shutil.copytree(directory_or_zip_path, INPUT_FOLDER_PATH)
-    else:
-        # Path is a file, assume it's a zip file and extract it
-        shutil.unpack_archive(directory_or_zip_path, INPUT_FOLDER_PATH, "zip")
-    
-    # Walk through the directory structure
-    for root, dirs, filenames in os.walk(INPUT_FOLDER_PATH):
-        for filename in filenames:
-            # Check if file extension matches the language
-            if filename.split('.')[-1] in language.file_extensions:
-                # Create a File object and add it to the list
-                file_path = os.path.join(root, filename)
-                files.append(file_path)
-    
-    return files
+    parser = argparse.ArgumentParser(prog=argv[0], description="Converts a code base to SPIF.")
+    parser.add_argument("input_directory_or_zip_path", help="Directory or zip archive containing the code base.")
+    parser.add_argument("output_file_path", help="Path of the SPIF file to write.")
+    parser.add_argument("--zip-native", action="store_true",
+                        help="Read source files straight out of the zip archive and only write the files the language servers need to disk.")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Number of processes used to lex and parse files (default: 1).")
+    parser.add_argument("--dfa-cache", nargs="?", const=DEFAULT_DFA_CACHE_DIRECTORY, metavar="DIRECTORY",
+                        help=f"Load the DFAs of the lexers and parsers from DIRECTORY at the start and save the warmed DFAs at the end (default: {DEFAULT_DFA_CACHE_DIRECTORY}).")
+    parser.add_argument("--fragment-cache", nargs="?", const=DEFAULT_FRAGMENT_CACHE_DIRECTORY, metavar="DIRECTORY",
+                        help=f"Reuse the nodes, data properties and simple edges of files whose content did not change since an earlier run, saved in DIRECTORY (default: {DEFAULT_FRAGMENT_CACHE_DIRECTORY}).")
+    parser.add_argument("--lsp-cache", nargs="?", const=DEFAULT_LANGUAGE_SERVER_CACHE_DIRECTORY, metavar="DIRECTORY",
+                        help=f"Reuse language server responses of earlier runs for unchanged files, saved in DIRECTORY (default: {DEFAULT_LANGUAGE_SERVER_CACHE_DIRECTORY}).")
+    parser.add_argument("--lsp-in-flight", type=int, default=1, metavar="N",
+                        help="Send up to N language server requests of a file concurrently, collected by a dry walk of the file (default: 1, one request at a time).")
+    parser.add_argument("--output-format", choices=["xml", "nt"], default="xml",
+                        help="Format of the output file: RDF/XML, serialized at the end, or N-Triples, written while the files are processed (default: xml).")
+    parser.add_argument("--compact-ids", action="store_true",
+                        help="End node IDs with a 16 character base32 digest of the file name instead of the 77 digit SHA-256 hash.")
+    parser.add_argument("--previous-output", metavar="PATH",
+                        help="Output of an earlier run, whose triples are reused for the files that did not change. Requires --changed-files.")
+    parser.add_argument("--changed-files", metavar="PATH",
+                        help="File listing the files that were changed, added or deleted since the run of --previous-output, one path relative to the input per line.")
+    parser.add_argument("--workspace-directory", metavar="DIRECTORY",
+                        help="Directory to create the temporary workspace of the run in, e.g. a tmpfs like /dev/shm (default: the system's temporary directory).")
+    parser.add_argument("--ontology", metavar="PATH",
+                        help=f"SEON code ontology (RDF/XML) to use instead of the bundled or cached one. Can also be set with {ONTOLOGY_PATH_ENVIRONMENT_VARIABLE}.")
+    arguments = parser.parse_args(argv[1:])
+    if (arguments.previous_output is None) != (arguments.changed_files is None):
+        parser.error("--previous-output and --changed-files must be used together.")
+    return arguments
 
 def main(argv):
     """Function that should be executed first.
@@ -52,29 +66,107 @@ def main(argv):
         argv (list[type]]): List of the provided CLI arguments.
     """
 
-    if len(argv) != 3:
-        raise Exception(f"Bad CLI arguments were provided. Usage: {argv[0]} <input_directory_or_zip_path> <output_file_path>")
-    
-    input_directory_or_zip_path, output_file_path = argv[1:3]
+    run(parse_arguments(argv))
+
+def run(arguments: argparse.Namespace):
+    """Converts the input of a run in a temporary workspace of its own, which is removed afterwards.
+
+    Args:
+        arguments (argparse.Namespace): The parsed CLI arguments, see parse_arguments.
+    """
+
+    # Every run copies or extracts its input to a workspace of its own, so several runs can share a working directory and a machine.
+    workspace_path = tempfile.mkdtemp(prefix="code-to-spif-", dir=arguments.workspace_directory)
+    try:
+        convert(arguments, os.path.join(workspace_path, "input"))
+    finally:
+        shutil.rmtree(workspace_path, ignore_errors=True)
+
+def convert(arguments: argparse.Namespace, input_folder_path: str, language_servers: LanguageServerPool = None):
+    """Converts the input of a run to SPIF.
+
+    Args:
+        arguments (argparse.Namespace): The parsed CLI arguments, see parse_arguments.
+        input_folder_path (str): Path of the folder that the input is copied or extracted to. Node IDs do not depend on it.
+        language_servers (LanguageServerPool): Pool of started language servers bound to input_folder_path, if any, see ConversionServer.
+    """
 
-    # List of rdfs for each language.
-    rdfs = []
+    input_directory_or_zip_path, output_file_path = arguments.input_directory_or_zip_path, arguments.output_file_path
 
-    for language in supported_languages:
-        # Retrieve files for the chosen language
-        files = get_files_for_language(input_directory_or_zip_path, language)
+    # Copy or extract the input once (or only index it, in zip-native mode) and index its files for all languages.
+    ingestion_start_time = time.perf_counter()
+    if arguments.zip_native and os.path.isfile(input_directory_or_zip_path):
+        manifest = InputManifest.from_zip(input_directory_or_zip_path, input_folder_path)
+    else:
+        manifest = InputManifest.from_input(input_directory_or_zip_path, input_folder_path)
+    print(f"Ingested input in {time.perf_counter() - ingestion_start_time:.2f} seconds.")
+
+    # The archive and the output file are closed also if the conversion fails, e.g. in a long-running conversion server.
+    with contextlib.ExitStack() as exit_stack:
+        exit_stack.callback(manifest.close)
+        if arguments.ontology:
+            CodeOntology.set_override_path(arguments.ontology)
+        dfa_cache = DFACache(arguments.dfa_cache) if arguments.dfa_cache else None
+        fragment_cache = FragmentCache(arguments.fragment_cache) if arguments.fragment_cache else None
+        incremental_analysis, reused_triples = None, []
+        if arguments.previous_output:
+            incremental_analysis = IncrementalAnalysis.load(arguments.previous_output, arguments.changed_files, manifest.root_path, arguments.compact_ids)
+            reused_triples = incremental_analysis.get_reused_triples()
+
+        # All languages add their triples to the store of one combined graph, so their graphs do not have to be merged.
+        # Each language adds them to a graph of its own in the store, and the combined graph is the union of these graphs.
+        # In N-Triples mode the triples are written as they are created instead, and the graph of a language is dropped once it is done.
+        combined_rdf, triple_writer = None, None
+        if arguments.output_format == "nt":
+            triple_writer = NTriplesWriter(exit_stack.enter_context(open(output_file_path, 'w', encoding='utf-8')))
+        else:
+            combined_rdf = Dataset(default_union=True)
+        languages_with_files = 0
+
+        processing_start_time = time.perf_counter()
+        for language in supported_languages:
+            # Retrieve files for the chosen language
+            files = manifest.get_files_for_language(language)
         
-        # Check that files were found.
-        if not files:
-            print(f"No files found for {language.name}.")
-            continue
+            # Check that files were found.
+            if not files:
+                print(f"No files found for {language.name}.")
+                continue
+
+            # Only the files affected by the changes are walked again in the second phase, if this run is incremental.
+            walked_files = None
+            if incremental_analysis:
+                walked_files = incremental_analysis.get_affected_files(files)
+                print(f"Walking {len(walked_files)} of {len(files)} {language.name} files again for the changed files.")
 
-        # Generate RDF specified by retrieved files in the given language
-        rdf = get_rdf(INPUT_FOLDER_PATH, files, language)
-        rdfs.append(rdf) 
+            # Generate RDF specified by retrieved files in the given language
+            rdf = get_rdf(manifest, files, language, arguments.jobs, dfa_cache, arguments.lsp_cache, arguments.lsp_in_flight, triple_writer, combined_rdf, arguments.compact_ids, walked_files, fragment_cache, language_servers)
+            languages_with_files += 1
+            # The written triples can not be looked up in the output file, so the reused triples that were created again are left out here.
+            if triple_writer and reused_triples:
+                reused_triples = [triple for triple in reused_triples if triple not in rdf]
+
+            # Only a serial run warms the DFAs of this process, parse workers keep theirs.
+            if dfa_cache and arguments.jobs <= 1:
+                dfa_cache.save(language)
+
+        # The triples of the unchanged files are taken over from the previous output. Triples that were created again are not duplicated.
+        if incremental_analysis:
+            print(f"Reused {len(reused_triples)} triples of {arguments.previous_output}.")
+            if triple_writer:
+                triple_writer.write(reused_triples)
+            elif reused_triples:
+                reused_rdf = Graph(store=combined_rdf.store)
+                reused_rdf.addN((s, p, o, reused_rdf) for s, p, o in reused_triples)
+                languages_with_files = max(languages_with_files, 1)
+
+    if triple_writer:
+        print(f"Wrote {triple_writer.written_triples} triples to {output_file_path}.")
+        print(f"Processed input in {time.perf_counter() - processing_start_time:.2f} seconds.")
+        return
 
     # Check that rdfs were generated.
-    if not rdfs:
+    if not languages_with_files:
         # Ths is very scuffed, but it will do for now. rdflib does not support empty graphs that contains the SEON line at the top.
         with open(output_file_path, 'w') as f:
             f.write(
@@ -85,15 +177,12 @@ def main(argv):
    xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
 >
 </rdf:RDF>""")
+        print(f"Processed input in {time.perf_counter() - processing_start_time:.2f} seconds.")
         return
 
-    # Merge all the rdfs into one.
-    combined_rdf = rdfs[0]
-    for i in range(1, len(rdfs)):
-        combined_rdf += rdfs[i]
-        
     # Export RDF.
     combined_rdf.serialize(destination=output_file_path, format='xml')
+    print(f"Processed input in {time.perf_counter() - processing_start_time:.2f} seconds.")
 
 if __name__ == "__main__":
     print("Running OWL-creation tool.")
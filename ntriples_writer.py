@@ -0,0 +1,22 @@
+from typing import TextIO
+# The row format of rdflib's own N-Triples serializer, which escapes literals as N-Triples requires.
+from rdflib.plugins.serializers.nt import _nt_row
+
+class NTriplesWriter():
+    """Writes triples to an N-Triples file while the graphs are created.
+
+    Unlike serializing a finished graph as RDF/XML, this needs no second copy of the graph in memory.
+    A graph can be dropped as soon as its triples are written, and N-Triples files of several graphs can simply be concatenated.
+    """
+
+    def __init__(self, output_file: TextIO):
+        """Initializes the writer for the text file output_file, opened for writing."""
+
+        self.output_file = output_file
+        self.written_triples = 0
+
+    def write(self, triples: list):
+        """Writes the (subject, predicate, object) triples to the output file."""
+
+        self.output_file.writelines(_nt_row(triple) for triple in triples)
+        self.written_triples += len(triples)
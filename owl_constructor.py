@@ -1,8 +1,12 @@
 from rdflib import Namespace
-from rdflib import Graph, RDF, Literal
+from rdflib import RDF, Literal, URIRef
 import urllib.parse
+import copy
 from context_interpreter import ContextInterpreter
 from language_server_communicator import LanguageServerCommunicator
+from code_ontology import CodeOntology
+from indexed_graph import IndexedGraph
+from fragment_cache import FileFragment
 
 class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
 
@@ -16,7 +20,6 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
     initializationPhase = True
     currentFilePath = None
     currentFileInstance = None
-    fileInstances = []
 
     _custom_definitions_namespace = Namespace("http://definitions.moonshot.sep/_#")
     _custom_instances_namespace = Namespace("http://instances.moonshot.sep/_#")
@@ -121,26 +124,47 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         "isExternalImport": _custom_definitions_namespace.isExternalImport,
     }
 
-    def __init__(self, lsp):
-        super().__init__(lsp)
+    def __init__(self, lsp, graph = None, compact_ids = False, root_path = None):
+        """ Set up the graph, which shares the store of graph if it is given, e.g. to create one graph for all languages.
+
+        With compact_ids, node IDs are made with short digests of the file names. Node IDs and file nodes use the paths of files relative to root_path, see ContextInterpreter.
+        """
+
+        super().__init__(lsp, compact_ids=compact_ids, root_path=root_path)
+        self.fileInstances = []
+        # Every listener extends its own copies of the classes and properties, see set_OWL_language_specifics.
+        self._OWL_classes = dict(self._OWL_classes)
+        self._OWL_object_properties = {kind: dict(properties) for kind, properties in self._OWL_object_properties.items()}
+        self._OWL_data_properties = dict(self._OWL_data_properties)
         # Setting up RDF stuff.
-        g = Graph()
+        # Lookups of single nodes and edges use the indexes of the store, so they do not need SPARQL queries.
+        # The graph has an identifier of its own, so lookups only see the triples of this listener, also if the store is shared.
+        g = IndexedGraph() if graph is None else IndexedGraph(store=graph.store)
         g.bind("ns1", self._custom_definitions_namespace)
         g.bind("SEON_general", self._SEON_general)
         g.bind("SEON_main", self._SEON_main)
         g.bind("SEON_code", self._SEON_code)
         self._g = g
-        self._code_graph = Graph().parse("http://se-on.org/ontologies/domain-specific/2012/02/code.owl")        
+
+        # The class hierarchy is read from a local copy of the ontology, see CodeOntology. Precompute the subclasses of every known class.
+        self._direct_sub_classes = CodeOntology.get().direct_sub_classes
+        self._sub_classes = {class_uri: self._get_sub_classes_recursively(class_uri) for class_uri in self._OWL_classes.values()}
         
         # Get all class names that are subclasses of CodeEntity
-        self.codeEntityClassNames = [x.split("#")[-1] for x in self._get_sub_classes_recursively(self._OWL_classes["CodeEntity"])]
+        self.codeEntityClassNames = [x.split("#")[-1] for x in self._get_sub_classes(self._OWL_classes["CodeEntity"])]
+
+        # Lookups of the initialization walk whose fragment is being recorded, see start_recording_file_fragment.
+        self._file_fragment_lookups = None
+        # Functions that undo the changes of the running dry walk to the indexes left out of the walk state, see record_walk_undo.
+        self._walk_undo_log = None
 
     """ Handle node, object property, and data property creation """
 
     def create_node_for_current_file(self, ctx):
         """ Create a node for the current file."""
-        self.currentFileInstance = self.create_OWL_class_instance(ctx, "File", self.currentFilePath)
+        self.currentFileInstance = self.create_OWL_class_instance(ctx, "File", self.relative_file_path(self.currentFilePath))
         self.fileInstances.append(self.currentFileInstance)
+        self.record_walk_undo(self.fileInstances.pop)
 
     def set_OWL_language_specifics(self, namespaceName: str, namespaceString: str, classes: list, object_properties: list, data_properties: list):
         """ Add additional language specific classes, object properties, and data properties to the OWL representation."""
@@ -160,10 +184,14 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         for data_property in data_properties:
             self._OWL_data_properties[data_property] = new_namespace[data_property]
 
-    def create_OWL_class_instance(self, ctx, class_name: str, instance_name: str):
-        """ Create an instance of a class in the OWL representation."""
+    def create_OWL_class_instance(self, ctx, class_name: str, instance_name: str, id: str = None):
+        """ Create an instance of a class in the OWL representation.
+
+        The ID of the instance is made from ctx, unless it is given.
+        """
         
-        id = self.create_deterministic_node_id_from_ctx(ctx)
+        if id is None:
+            id = self.create_deterministic_node_id_from_ctx(ctx)
         instance_name = self._clean_instance_name(instance_name)
         instance = self.get_instance_from_id(instance_name, id)  
 
@@ -176,6 +204,15 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
 
         return instance
 
+    def create_built_in_OWL_class_instance(self, class_name: str, instance_name: str):
+        """ Create an instance of a class for something that is built into the language, like a primitive type or an access modifier.
+
+        Its ID is made from the listener class, the class name and the instance name, so it is the same in every run but differs between languages.
+        """
+
+        id = self.create_deterministic_node_id_from_code_identifier(instance_name, f"{type(self).__name__}.{class_name}")
+        return self.create_OWL_class_instance(None, class_name, instance_name, id)
+
     def create_OWL_object_property_instance(self, from_instance, to_instance, property_name: str):        
         """ Create an instance of an object property in the OWL representation."""
         
@@ -200,20 +237,19 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         
         self._g.add((instance, self._OWL_data_properties[property_name], Literal(property_value)))
 
+    def _get_sub_classes(self, class_uri):
+        """ Get a class and all of its subclasses from the precomputed class hierarchy."""
+
+        # Classes added later, e.g. by set_OWL_language_specifics, are looked up once and remembered.
+        if class_uri not in self._sub_classes:
+            self._sub_classes[class_uri] = self._get_sub_classes_recursively(class_uri)
+        return self._sub_classes[class_uri]
+
     def _get_sub_classes_recursively(self, class_uri):
         """ Get all subclasses of a class recursively"""
         
-        # Construct query
-        sub_class_query = f'''
-            SELECT ?subClass
-            WHERE {{
-                {f"?subClass rdfs:subClassOf <{class_uri}> . "}
-            }}
-        '''
-        rows = self._code_graph.query(sub_class_query)
         nested_sub_classes = []
-        for row in rows:
-            sub_class = row['subClass']
+        for sub_class in self._direct_sub_classes.get(class_uri, []):
             # Recursively get all sub classes
             nested_sub_classes += self._get_sub_classes_recursively(sub_class)
         
@@ -232,23 +268,23 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         instance_name = self._clean_instance_name(instance_name)
         # Checks all sub types.
         # e.g. if class_name is "Datatype", it should check for instances of type "PrimitiveType", "ComplexType", etc.
-        sub_types = self._get_sub_classes_recursively(self._OWL_classes[class_name])
-        sub_types_values = ' '.join(f"<{uri}>" for uri in list(sub_types))
-
-        query = f'''
-            SELECT ?description
-            WHERE {{
-                ?description rdf:type ?type .
-                {f'?description SEON_code:hasCodeIdentifier "{instance_name}" .' if instance_name else ""}
-                {f'?description SEON_code:isDeclaredMethodOf <{isDeclaredMethodOf}> .' if isDeclaredMethodOf else ""}
-                {f'?description SEON_code:isDeclaredFieldOf <{isDeclaredFieldOf}> .' if isDeclaredFieldOf else ""}
-                {f'?description SEON_code:hasDatatype <{hasDatatype}> .' if hasDatatype else ""}
-                VALUES ?type {{ {sub_types_values} }}
-            }}
-        '''
-
-        qres = self._g.query(query)
-        return list(set([x['description'] for x in qres])) # Remove duplicates 
+        sub_types = self._get_sub_classes(self._OWL_classes[class_name])
+
+        # Start from the smallest index: the instances with the code identifier, or else all instances of the types.
+        if instance_name:
+            descriptions = self._g.get_subjects(self._SEON_code.hasCodeIdentifier, Literal(instance_name))
+            descriptions = [x for x in descriptions if any(self._g.has_triple(x, RDF.type, sub_type) for sub_type in sub_types)]
+        else:
+            descriptions = [x for sub_type in sub_types for x in self._g.get_subjects(RDF.type, sub_type)]
+
+        for predicate, value in ((self._SEON_code.isDeclaredMethodOf, isDeclaredMethodOf), (self._SEON_code.isDeclaredFieldOf, isDeclaredFieldOf), (self._SEON_code.hasDatatype, hasDatatype)):
+            if value:
+                descriptions = [x for x in descriptions if self._g.has_triple(x, predicate, URIRef(value))]
+
+        descriptions = list(dict.fromkeys(descriptions)) # Remove duplicates 
+        if self._file_fragment_lookups is not None and self.initializationPhase:
+            self._file_fragment_lookups.append((self._g.count_recorded_additions(), (instance_name, class_name, isDeclaredMethodOf, isDeclaredFieldOf, hasDatatype), descriptions))
+        return descriptions
 
     def _clean_instance_name(self, instance_name):
         """ Clean the instance name by removing brackets and encoding the class name."""
@@ -274,7 +310,9 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         instance_name = self._clean_instance_name(instance_name)
         descriptions = self.get_instances_from_code_identifier(instance_name, class_name, isDeclaredMethodOf, isDeclaredFieldOf, hasDatatype)
         if len(descriptions) == 0 and not self.initializationPhase:
-            node_id = self.create_deterministic_node_id_from_ctx(None)
+            # The node of an external thing is identified by its code identifier and class, so every external thing gets one node.
+            # Like the IDs of built-in things, the ID includes the listener class, so the languages sharing a store keep their own nodes.
+            node_id = self.create_deterministic_node_id_from_code_identifier(instance_name, f"{type(self).__name__}.{class_name}")
             node = self._create_external_OWL_class_instance_if_instance_does_not_exists(instance_name, class_name, node_id)
             return node
 
@@ -299,15 +337,8 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         if attribute_name not in self._OWL_data_properties and attribute_name not in self._OWL_object_properties["simple"]:
             return None
 
-        query = f"""
-            SELECT ?{attribute_name}
-            WHERE {{
-                <{instance}> SEON_code:{attribute_name} ?{attribute_name} .
-            }}
-        """
-        qres = self._g.query(query)
-        # Remove duplicates
-        attributes = list(set([x[attribute_name] for x in qres])) 
+        # Attributes are looked up as SEON code properties, like the SPARQL query this replaces did.
+        attributes = self._g.get_objects(URIRef(instance), self._SEON_code[attribute_name])
         
         return attributes[-1] if attributes else None
 
@@ -316,16 +347,7 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         
         if self.initializationPhase and not override_first_tree_walk:
             return []
-        # construct query
-        query = f"""
-            SELECT ?resource
-            WHERE {{
-                <{instance}> rdf:type ?resource .
-            }}
-        """
-        qres = self._g.query(query)
-        # Remove duplicates
-        result = list(set([x['resource'] for x in qres]))
+        result = self._g.get_objects(URIRef(instance), RDF.type)
         if len(result) >= 1:
             return result[0]
         return None
@@ -334,7 +356,152 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         """ Get the graph."""
         
         return self._g
+
+    """ Snapshots of the state of a walk """
+
+    # Public attributes that are left out of snapshots of the walk state. These are the attributes that do not change while walking a tree
+    # in the regular phase, and the indexes that grow with the project, whose changes are undone through record_walk_undo instead of copied.
+    _attributes_excluded_from_walk_state = ("lsp", "language_server_cache", "codeEntityClassNames", "fileInstances")
+
+    def _get_walk_state_attribute_names(self):
+        """ Get the names of the attributes that the listener may change while walking a tree, which are its public instance attributes."""
+
+        return sorted(name for name in vars(self) if not name.startswith("_") and name not in self._attributes_excluded_from_walk_state)
+
+    def get_walk_state(self):
+        """ Get a copy of the state that the listener changes while walking a tree, to restore it with set_walk_state.
+
+        The graph and the indexes left out of the walk state are not part of this state.
+        """
+
+        return {name: copy.deepcopy(getattr(self, name)) for name in self._get_walk_state_attribute_names()}
+
+    def set_walk_state(self, state):
+        """ Restore the state that the listener had when get_walk_state was called."""
+
+        for name, value in state.items():
+            setattr(self, name, value)
+        # Attributes that were set since, e.g. over a class attribute with a default value, are removed again.
+        for name in self._get_walk_state_attribute_names():
+            if name not in state:
+                delattr(self, name)
+
+    def start_dry_walk(self):
+        """ Start a walk of a tree that has no lasting effects, e.g. to find out which language server requests a walk needs.
+
+        Changes to the graph and the walk state are undone by end_dry_walk, and requests that are not in the cache return no result.
+        """
+
+        self._dry_walk_state = self.get_walk_state()
+        self._walk_undo_log = []
+        self._g.start_journal()
+        self.start_recording_requests()
+
+    def end_dry_walk(self):
+        """ Undo the effects of the walk since start_dry_walk and get the language server requests that it needed but were not in the cache."""
+
+        requests = self.stop_recording_requests()
+        self._g.rollback_journal()
+        undo_log, self._walk_undo_log = self._walk_undo_log, None
+        for undo in reversed(undo_log):
+            undo()
+        self.set_walk_state(self._dry_walk_state)
+        self._dry_walk_state = None
+        return requests
+
+    def record_walk_undo(self, undo):
+        """ Record a function that undoes a change to an index that is left out of the walk state, if a dry walk is running."""
+
+        if self._walk_undo_log is not None:
+            self._walk_undo_log.append(undo)
+
+    def set_walk_index_item(self, index, key, value):
+        """ Set the item of an index that is left out of the walk state, so that a dry walk can undo it."""
+
+        if key in index:
+            previous_value = index[key]
+            self.record_walk_undo(lambda: index.__setitem__(key, previous_value))
+        else:
+            self.record_walk_undo(lambda: index.pop(key))
+        index[key] = value
     
+    """ Writing the graph out while it is created """
+
+    def start_collecting_new_triples(self):
+        """ Start collecting the triples of the graph, including the ones already in it, see pop_new_triples."""
+
+        self._g.start_collecting_new_triples()
+
+    def pop_new_triples(self):
+        """ Get the triples that were added to the graph and not returned by an earlier call, e.g. to write them out after each file."""
+
+        return self._g.pop_new_triples()
+
+    """ Reusing the initialization walks of unchanged files """
+
+    def start_recording_file_fragment(self):
+        """ Start recording the fragment of the graph that the initialization walk of the current file creates, see FragmentCache."""
+
+        self._g.start_recording_additions()
+        self._file_fragment_lookups = []
+
+    def stop_recording_file_fragment(self):
+        """ Get the fragment recorded since start_recording_file_fragment, or None if it can not be reused because the walk asked the language server."""
+
+        triples = self._g.stop_recording_additions()
+        lookups, self._file_fragment_lookups = self._file_fragment_lookups, None
+        if lookups is None:
+            return None
+        return FileFragment(triples, lookups)
+
+    def add_file_fragment(self, file_path, fragment):
+        """ Add the fragment of the file instead of walking it in the initialization phase.
+
+        The triples are added in the order of the walk, and every node lookup of the walk is repeated after the triples that were added before it.
+        Returns False without adding anything if a lookup gives a different result now, e.g. because another file declares
+        the same package first. The file then has to be walked.
+        """
+
+        self.initializationPhase = True
+        self.currentFilePath = file_path
+        self._g.start_journal()
+        added_triples = 0
+        for number_of_triples, arguments, descriptions in fragment.lookups:
+            self._g.addN((s, p, o, self._g) for s, p, o in fragment.triples[added_triples:number_of_triples])
+            added_triples = max(added_triples, number_of_triples)
+            if self.get_instances_from_code_identifier(*arguments) != descriptions:
+                self._g.rollback_journal()
+                return False
+        self._g.addN((s, p, o, self._g) for s, p, o in fragment.triples[added_triples:])
+        self._g.stop_journal()
+
+        # Restore the state that the walk of the file leaves behind for the other files.
+        self.currentFileInstance = next(s for s, p, o in fragment.triples if p == RDF.type and o == self._OWL_classes["File"])
+        self.fileInstances.append(self.currentFileInstance)
+        return True
+
+    """ Files that are not walked in the regular phase """
+
+    # Classes of the declarations whose references the regular walk collects for the walks of other files, see collect_declaration_references.
+    referencedDeclarationClassNames = ()
+
+    @classmethod
+    def fragment_declares_referenced_entities(cls, fragment):
+        """ Check if the file of the fragment declares something whose references the regular walks of other files need.
+
+        The file then has to be parsed for TwoPhaseParseTreeWalker.referenceWalk, even if it is not walked in the regular phase.
+        """
+
+        declaration_classes = {cls._OWL_classes[class_name] for class_name in cls.referencedDeclarationClassNames}
+        return any(p == RDF.type and o in declaration_classes for _, p, o in fragment.triples)
+
+    def collect_declaration_references(self, ctx):
+        """ Collect the references to the declaration at ctx, like the regular walk does, without creating any edges.
+
+        Called by TwoPhaseParseTreeWalker.referenceWalk for every context of a file that is not walked in the regular phase.
+        Listeners whose regular walks need the references collected for other files, e.g. the accesses of a field, override this.
+        """
+
     """ Handle nodes that are imported in the code base """
 
     def _create_external_OWL_class_instance_if_instance_does_not_exists(self, instance_name, class_name, id):
@@ -381,6 +548,9 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
         
         if self.initializationPhase and not override_first_tree_walk:
             return None
+        # The answer depends on other files in a way the fragment of the file can not check.
+        if self.initializationPhase:
+            self._file_fragment_lookups = None
 
         instance_name = self._clean_instance_name(instance_name)
 
@@ -402,17 +572,9 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
 
         # Create unique identifier from this
         id = self.create_deterministic_node_id_from_filename_line_column(def_file_name, def_line, def_column)
-        # Get the instance with this ID.
-        query = f'''
-            SELECT ?description
-            WHERE {{
-                ?description SEON_code:hasIdentifier "{id}" .
-                ?description SEON_code:hasCodeIdentifier "{instance_name}" .
-
-            }}
-        '''
-        qres = self._g.query(query)
-        descriptions = list(set([x['description'] for x in qres]))
+        # Get the instance with this ID, from the index of hasIdentifier values that is filled while the nodes are created.
+        descriptions = [x for x in self._g.get_subjects(self._SEON_code.hasIdentifier, Literal(id))
+                        if self._g.has_triple(x, self._SEON_code.hasCodeIdentifier, Literal(str(instance_name)))]
         
         if len(descriptions) == 1:
             for row in descriptions:
@@ -455,27 +617,4 @@ class OWLConstructor(ContextInterpreter, LanguageServerCommunicator):
             id = self.create_deterministic_node_id_from_filename_line_column(def_file_name, def_line, def_column)
             ret.append(id)
 
-        return ret
-
-    def get_instances_where_file_is_defined(self, line, col, file_name, instance):
-        """ Uses the language server to obtain what files are referenced by the current file """
-
-        if self.initializationPhase:
-            return []
-
-        # Call language server with
-        result = self.request_definition_from_file_line_column(file_name, line, col)
-
-        files = []
-        # Create the list of file instances
-        for (_, _, def_file_name) in result:
-            if def_file_name.startswith("file://"):
-                def_file_name = def_file_name[7:]
-            else:
-                continue
-            for file_instance in self.fileInstances:
-                if def_file_name in file_instance:
-                    if file_instance not in files and file_instance != instance:
-                        files.append(file_instance)
-        
-        return files
\ No newline at end of file
+        return ret
\ No newline at end of file
@@ -1,72 +1,247 @@
+import os
+import contextlib
+from typing import TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
 from asbstract_syntax_tree import AST
 from two_phase_parse_tree_walker import TwoPhaseParseTreeWalker
+from language_server_pipeline import LanguageServerPipeline
 from supported_language import SupportedLanguage
+from input_manifest import InputManifest
+from dfa_cache import DFACache
+from fragment_cache import FragmentCache
+from ntriples_writer import NTriplesWriter
 from monitors4codegen.multilspy import SyncLanguageServer
 from monitors4codegen.multilspy.multilspy_config import MultilspyConfig
 from monitors4codegen.multilspy.multilspy_logger import MultilspyLogger
 from rdflib import Graph
 from antlr4 import FileStream, CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 
-def asts_to_rdf(asts: list[AST], language: SupportedLanguage, root_path: str) -> Graph:    
+if TYPE_CHECKING:
+    # Only imported for the annotations, language_server_pool creates its language servers with this module.
+    from language_server_pool import LanguageServerPool
+
+def create_language_server(language: SupportedLanguage, root_path: str) -> SyncLanguageServer:
+    """Creates the language server for [language] in the workspace at [root_path]. It still has to be started.
+
+    Args:
+        language (SupportedLanguage): Language of the language server.
+        root_path (str): Root path of the files that the language server resolves the requests in.
+
+    Returns:
+        SyncLanguageServer: The language server.
+    """
+
+    print("Initializing language server for " + language.name)
+    lsp = SyncLanguageServer.create(MultilspyConfig.from_dict({"code_language": language.name.lower()}), MultilspyLogger(), root_path)
+    lsp.repository_root_path = root_path
+    return lsp
+
+def asts_to_rdf(asts: list[AST], language: SupportedLanguage, root_path: str, lsp_cache_directory: str = None, lsp_requests_in_flight: int = 1, triple_writer: NTriplesWriter = None, graph: Graph = None, compact_ids: bool = False, walked_files: set[str] = None, fragment_cache: FragmentCache = None, language_servers: 'LanguageServerPool' = None) -> Graph:    
     """Generates RDF from the provided ASTs in the provided language.
 
     Args:
         asts (list[AST]): List of ASTs to generate RDF from.
         language (SupportedLanguage): Language in which the the files from which the ASTs were generated were written.
-        root_path (str): Root path of the files.
+        root_path (str): Root path of the files. Node IDs and file nodes use the paths of the files relative to it.
+        lsp_cache_directory (str): Directory to load language server responses of earlier runs from and save the new ones to, if any.
+        lsp_requests_in_flight (int): Number of language server requests that are sent concurrently. With 1, requests are sent one by one.
+        triple_writer (NTriplesWriter): Writer that the triples are written to after each file, if any.
+        graph (Graph): Graph whose store the triples are added to, if any. Otherwise the triples are added to a new graph.
+        compact_ids (bool): Whether node IDs are made with short digests of the file names instead of full SHA-256 hashes.
+        walked_files (set[str]): Paths of the files that are walked in the second phase, if not all of them, see IncrementalAnalysis.
+        fragment_cache (FragmentCache): Cache with the fragments of the files to add instead of walking them in the initialization phase, if any.
+            The ASTs of files with a fragment may have no tree if they are not walked in the second phase and declare nothing
+            whose references the other files need, see OWLConstructor.fragment_declares_referenced_entities.
+        language_servers (LanguageServerPool): Pool of started language servers bound to root_path to use, if any. Otherwise a language server is started for these ASTs.
 
     Returns:
         Graph: RDF generated from the provided ASTs.
     """
 
-    print("Initializing language server for " + language.name)
-    lsp = SyncLanguageServer.create(MultilspyConfig.from_dict({"code_language": language.name.lower()}), MultilspyLogger(), root_path)
-    lsp.repository_root_path = root_path
-    with lsp.start_server():
+    # The language servers of a pool are started already, and keep running after the walks.
+    lsp = language_servers.get(language) if language_servers else create_language_server(language, root_path)
+    with contextlib.nullcontext() if language_servers else lsp.start_server():
         print(f"Language server for language {language.name} started")
-        listener = language.listener(lsp)
+        listener = language.listener(lsp, graph, compact_ids, root_path)
         walker = TwoPhaseParseTreeWalker()
+        cache = listener.language_server_cache
+        if lsp_cache_directory:
+            cache_file_path = os.path.join(lsp_cache_directory, f"{language.name}.pickle")
+            cache.load(cache_file_path, root_path, [ast.file_path for ast in asts])
 
+        if triple_writer:
+            listener.start_collecting_new_triples()
+        reused_fragments = 0
         for ast in asts:
+            fragment = fragment_cache.get_fragment(ast.file_path) if fragment_cache else None
+            if fragment and listener.add_file_fragment(ast.file_path, fragment):
+                reused_fragments += 1
+                continue
+            if ast.tree is None:
+                # The fragment could not be reused after all, so the file is parsed now. It was written to disk for the language server.
+                ast.tree = create_ast(ast.file_path, language).tree
+            if fragment_cache:
+                listener.start_recording_file_fragment()
             walker.initializationWalk(listener, ast)
+            if fragment_cache:
+                fragment = listener.stop_recording_file_fragment()
+                if fragment:
+                    fragment_cache.save_fragment(ast.file_path, fragment)
+        if fragment_cache:
+            print(f"Reused the cached initialization walks of {reused_fragments} of {len(asts)} {language.name} files.")
+        pipeline = LanguageServerPipeline(lsp, lsp_requests_in_flight) if lsp_requests_in_flight > 1 else None
         for ast in asts:
+            if walked_files is not None and ast.file_path not in walked_files:
+                # The walks of the other files still need the references to what the file declares.
+                if ast.tree is not None:
+                    walker.referenceWalk(listener, ast)
+                continue
+            if pipeline:
+                pipeline.prefetch(walker, listener, ast)
             walker.regularWalk(listener, ast)
+            # Nodes and edges are not removed once a file is walked, so its triples can be written out right away.
+            if triple_writer:
+                triple_writer.write(listener.pop_new_triples())
+
+        print(f"Language server cache for {language.name}: {cache.hits} hits ({cache.persisted_hits} from earlier runs), {cache.misses} misses.")
+        print(f"Skipped {listener.skipped_requests} {language.name} language server requests that could not produce an edge.")
+        if pipeline:
+            print(f"Sent {pipeline.prefetched_requests} language server requests for {language.name} ahead of the walks, up to {lsp_requests_in_flight} at a time.")
+        if lsp_cache_directory:
+            cache.save(cache_file_path)
 
-        return listener.get_graph()
+        graph = listener.get_graph()
+        if triple_writer:
+            triple_writer.write(listener.pop_new_triples())
+        return graph
 
 
-def get_rdf(root_path: str, files: list[str], language: SupportedLanguage) -> Graph:
+def get_rdf(manifest: InputManifest, files: list[str], language: SupportedLanguage, jobs: int = 1, dfa_cache: DFACache = None, lsp_cache_directory: str = None, lsp_requests_in_flight: int = 1, triple_writer: NTriplesWriter = None, graph: Graph = None, compact_ids: bool = False, walked_files: set[str] = None, fragment_cache: FragmentCache = None, language_servers: 'LanguageServerPool' = None) -> Graph:
     """Returns RDF generated from the provided [files] in [language].
 
     Args:
+        manifest (InputManifest): Manifest of the input the files belong to.
         files (list[str]): Paths of files to generate RDF from.
         language (SupportedLanguage): Language in which files were written.
+        jobs (int): Number of processes used to lex and parse the files.
+        dfa_cache (DFACache): Cache to load the DFAs of the lexer and parser from, if any.
+        lsp_cache_directory (str): Directory of the language server response cache, if any.
+        lsp_requests_in_flight (int): Number of language server requests that are sent concurrently.
+        triple_writer (NTriplesWriter): Writer that the triples are written to while they are created, if any.
+        graph (Graph): Graph whose store the triples are added to, if any, e.g. to share one graph between languages.
+        compact_ids (bool): Whether node IDs are made with short digests of the file names.
+        walked_files (set[str]): Paths of the files whose edges are created in the second phase, if not all of them.
+        fragment_cache (FragmentCache): Cache of the fragments of the graph that the initialization walks create, if any.
+        language_servers (LanguageServerPool): Pool of started language servers bound to the root path of the manifest, if any.
 
     Returns:
         Graph: generated rdf representation of the provided files.
     """
-    asts = [create_ast(file, language) for file in files] # Generate ASTs
-    asts = [ast for ast in asts if ast is not None] # Remove None ASTs
-    rdf = asts_to_rdf(asts, language, root_path)
+    # Files with a cached fragment are only parsed if they are walked in the second phase, or declare something the walks of other files need.
+    parsed_files = files
+    if fragment_cache:
+        fragment_cache.load_fragments(language, files, (manifest.read_bytes(file_path) for file_path in files), compact_ids, manifest.root_path)
+        parsed_files = [file_path for file_path in files if not fragment_cache.get_fragment(file_path) or walked_files is None or file_path in walked_files
+                        or language.listener.fragment_declares_referenced_entities(fragment_cache.get_fragment(file_path))]
+
+    parsed_asts = create_asts(manifest, parsed_files, language, jobs, dfa_cache) # Generate ASTs
+    parsed_asts = {ast.file_path: ast for ast in parsed_asts if ast is not None} # Remove None ASTs
+    fallback_count = sum(1 for ast in parsed_asts.values() if ast.used_ll_fallback)
+    print(f"{fallback_count} of {len(parsed_asts)} {language.name} files needed the full LL fallback after SLL parsing failed.")
+    skipped_files = set(files) - set(parsed_files)
+    asts = [parsed_asts[file_path] if file_path in parsed_asts else AST(file_path, None) for file_path in files if file_path in parsed_asts or file_path in skipped_files]
+    # The language server reads the files from disk, and resolves them with the project and build descriptors of the input.
+    manifest.materialize(files)
+    manifest.materialize_project_files()
+    rdf = asts_to_rdf(asts, language, manifest.root_path, lsp_cache_directory, lsp_requests_in_flight, triple_writer, graph, compact_ids, walked_files, fragment_cache, language_servers)
     
     return rdf
 
-def create_ast(file_path: str, language: SupportedLanguage) -> AST:
+def create_asts(manifest: InputManifest, files: list[str], language: SupportedLanguage, jobs: int = 1, dfa_cache: DFACache = None) -> list[AST]:
+    """Parses the provided [files] in [language], in a pool of [jobs] processes if jobs is larger than 1.
+
+    Args:
+        manifest (InputManifest): Manifest to read the files from.
+        files (list[str]): Paths of files to parse.
+        language (SupportedLanguage): Language in which files were written.
+        jobs (int): Number of processes used to lex and parse the files.
+        dfa_cache (DFACache): Cache to load the DFAs of the lexer and parser from, if any.
+
+    Returns:
+        list[AST]: ASTs of the files, in the same order as the files. None for files that could not be decoded.
+    """
+    if dfa_cache:
+        dfa_cache.load(language)
+    if jobs <= 1 or len(files) <= 1:
+        return [create_ast(file, language, manifest) for file in files]
+
+    # Workers send the ASTs back pickled, see AST.__reduce__.
+    chunk_size = max(1, len(files) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initialize_parse_worker, initargs=(manifest, language, dfa_cache)) as executor:
+        return list(executor.map(_create_ast_in_worker, files, chunksize=chunk_size))
+
+# State of a parse worker process, set by _initialize_parse_worker.
+_worker_manifest = None
+_worker_language = None
+
+def _initialize_parse_worker(manifest: InputManifest, language: SupportedLanguage, dfa_cache: DFACache = None):
+    """Stores the manifest and language that the parse worker process reads and parses files with.
+
+    Workers that did not inherit the cached DFAs from the main process load them from dfa_cache.
+    """
+
+    global _worker_manifest, _worker_language
+    _worker_manifest, _worker_language = manifest, language
+    if dfa_cache:
+        dfa_cache.load(language)
+
+def _create_ast_in_worker(file_path: str) -> AST:
+    """Parses the file at file_path in a parse worker process."""
+
+    return create_ast(file_path, _worker_language, _worker_manifest)
+
+def create_ast(file_path: str, language: SupportedLanguage, manifest: InputManifest = None) -> AST:
     """Parses the file at file_path in language as an AST.
 
     Args:
         file_path (str): Path provided for the file to be parsed.
         language (SupportedLanguage): Language in which the provided file was written.
+        manifest (InputManifest): Manifest to read the file from. If not provided, the file is read from disk.
 
     Returns:
         AST of the provided file.
     """
     try:
-        input_stream = FileStream(file_path, encoding='utf-8')
+        if manifest:
+            input_stream = manifest.open_input_stream(file_path)
+        else:
+            input_stream = FileStream(file_path, encoding='utf-8')
         lexer = language.lexer(input_stream)
         stream = CommonTokenStream(lexer)
         parser = language.parser(stream)
+
+        # First try the much faster SLL prediction, giving up at the first syntax error.
+        # SLL only fails on input that is invalid or needs full LL context, so the result is the same as with LL if it succeeds.
+        error_listeners = list(parser._listeners)
+        parser.removeErrorListeners()
+        parser._interp.predictionMode = PredictionMode.SLL
+        parser._errHandler = BailErrorStrategy()
+        try:
+            tree = getattr(parser, language.unitMethodName)()
+            return AST(file_path, tree)
+        except ParseCancellationException:
+            pass
+
+        # Parse again from the start with full LL prediction and the default error recovery.
+        parser.reset()
+        for error_listener in error_listeners:
+            parser.addErrorListener(error_listener)
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
         tree = getattr(parser, language.unitMethodName)()
-        return AST(file_path, tree)
+        return AST(file_path, tree, used_ll_fallback=True)
     except UnicodeDecodeError:
         return None
@@ -0,0 +1,70 @@
+import pickle
+import unittest
+from antlr4 import CommonTokenStream
+from antlr4.tree.Tree import TerminalNode
+from antlr_generated_code.java.JavaLexer import JavaLexer
+from antlr_generated_code.java.JavaParser import JavaParser
+from antlr_generated_code.cpp.CPP14Lexer import CPP14Lexer
+from antlr_generated_code.cpp.CPP14Parser import CPP14Parser
+from asbstract_syntax_tree import AST
+from input_manifest import ArchiveMemberStream
+
+## This class runs tests for the AST class in the asbstract_syntax_tree.py file.
+class TestAST(unittest.TestCase):
+    java_code = "package a.b;\nclass Square extends Shape {\n    private int side;\n    int area() { return side * side; }\n}\n"
+    # Deeply nested expressions exceed the recursion limit of pickle if the tree is pickled as is.
+    cpp_code = "namespace geo {\nint f(int a) { return " + "(" * 40 + "a" + " + 1)" * 40 + "; }\n}\n"
+
+    def test_pickle_java(self):
+        """
+        Test that a pickled Java AST has the same structure, tokens and file name as the original
+        """
+        ast = self.parse(self.java_code, JavaLexer, JavaParser, "compilationUnit")
+        self.assertEqual(self.describe(pickle.loads(pickle.dumps(ast)).tree), self.describe(ast.tree))
+
+    def test_pickle_cpp(self):
+        """
+        Test that a pickled, deeply nested C++ AST has the same structure, tokens and file name as the original
+        """
+        ast = self.parse(self.cpp_code, CPP14Lexer, CPP14Parser, "translationUnit")
+        self.assertEqual(self.describe(pickle.loads(pickle.dumps(ast)).tree), self.describe(ast.tree))
+
+    def test_pickle_keeps_labels(self):
+        """
+        Test that label attributes of generated contexts refer to the unpickled nodes
+        """
+        ast = pickle.loads(pickle.dumps(self.parse(self.cpp_code, CPP14Lexer, CPP14Parser, "translationUnit")))
+        namespace_ctx = ast.tree.declarationseq().declaration(0).namespaceDefinition()
+        self.assertIs(namespace_ctx.namespaceBody, namespace_ctx.declarationseq())
+
+    def test_pickle_keeps_ll_fallback(self):
+        """
+        Test that a pickled AST still tells whether it needed the full LL fallback
+        """
+        ast = self.parse(self.java_code, JavaLexer, JavaParser, "compilationUnit")
+        ast.used_ll_fallback = True
+        self.assertTrue(pickle.loads(pickle.dumps(ast)).used_ll_fallback)
+        self.assertFalse(pickle.loads(pickle.dumps(self.parse(self.java_code, JavaLexer, JavaParser, "compilationUnit"))).used_ll_fallback)
+
+    ### BEGIN HELPER METHODS ###
+
+    def parse(self, code, lexer_class, parser_class, unit_method_name):
+        parser = parser_class(CommonTokenStream(lexer_class(ArchiveMemberStream("test_file", code))))
+        return AST("test_file", getattr(parser, unit_method_name)())
+
+    def describe(self, node):
+        """Returns a list describing every node of the tree in pre-order."""
+        description = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, TerminalNode):
+                token = node.symbol
+                description.append((token.type, token.line, token.column, token.text, token.getInputStream().fileName))
+            else:
+                description.append((type(node).__name__, node.invokingState, node.start.line, node.start.column, node.stop.line, node.stop.column))
+                stack.extend(reversed(node.children or []))
+        return description
+
+if __name__ == '__main__':
+    unittest.main()
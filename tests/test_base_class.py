@@ -194,7 +194,21 @@ class TestBaseClass(TestBaseContextInterpreter):
 
         self.target.initializationPhase = False
         list_integer_instance = self.target.get_instance_from_code_identifier("List%3CInteger%3E", class_name="Datatype")
-        self.assertEqual(self._custom_instances_namespace[f'List%3CInteger%3E_{self.custom_UUID}'], list_integer_instance, "Incorrect instance.")
+        external_id = self.target.create_deterministic_node_id_from_code_identifier("List%3CInteger%3E", "OWLConstructor.Datatype")
+        self.assertEqual(self._custom_instances_namespace[f'List%3CInteger%3E_{external_id}'], list_integer_instance, "Incorrect instance.")
+        self.assertTrue(external_id.startswith("0_0_"), "External node ID is not deterministic.")
+        mocked_method.assert_not_called()
+
+        # The external node is reused, and other listeners, e.g. of later runs, create the same node.
+        self.assertEqual(self.target.get_instance_from_code_identifier("List%3CInteger%3E", class_name="Datatype"), list_integer_instance)
+        other_target = OWLConstructor(None)
+        other_target.initializationPhase = False
+        self.assertEqual(other_target.get_instance_from_code_identifier("List%3CInteger%3E", class_name="Datatype"), list_integer_instance)
+
+        # Listeners of other languages create nodes of their own.
+        other_language_target = type("OtherLanguageListener", (OWLConstructor,), {})(None)
+        other_language_target.initializationPhase = False
+        self.assertNotEqual(other_language_target.get_instance_from_code_identifier("List%3CInteger%3E", class_name="Datatype"), list_integer_instance)
     
     def test_get_instances_from_code_identifier(self):
         """
@@ -211,6 +225,18 @@ class TestBaseClass(TestBaseContextInterpreter):
         # Check if expected amount of elements is in the outputted array
         self.assertEqual(len(string_instances), 2, "Amount of instances is unexpected")
 
+    def test_get_sub_classes(self):
+        """
+        Test _get_sub_classes method
+        """
+        sub_classes = self.target._get_sub_classes(self._OWL_classes["Datatype"])
+        self.assertEqual(sub_classes[0], self._OWL_classes["Datatype"])
+        self.assertTrue(self._OWL_classes["PrimitiveType"] in sub_classes, "PrimitiveType is not a subclass of Datatype")
+        self.assertTrue(self._OWL_classes["ClassType"] in sub_classes, "ClassType is not a nested subclass of Datatype")
+        self.assertFalse(self._OWL_classes["Method"] in sub_classes, "Method is a subclass of Datatype")
+        # The hierarchy is precomputed, repeated lookups return the same list.
+        self.assertIs(self.target._get_sub_classes(self._OWL_classes["Datatype"]), sub_classes)
+
     def test_get_attribute_instance_from_instance(self):
         """
         Test get_attribute_instance_from_instance method
@@ -262,7 +288,92 @@ class TestBaseClass(TestBaseContextInterpreter):
         expectedInstance = self._custom_instances_namespace['instance_name_id']
         instance = self.target.get_instance_from_id('instance_name', 'id')
         self.assertEqual(instance, expectedInstance)
-    
+
+    @patch.object(OWLConstructor, 'create_deterministic_node_id_from_filename_line_column')
+    @patch.object(OWLConstructor, 'request_definition_from_ctx')
+    def test_get_instance_from_lsp_definition(self, request_definition, unique_id):
+        """
+        Test get_instance_from_lsp_definition method
+        """
+        self.createClassAndMethodNodes()
+        self.target._g.add((self.class_instance, self._OWL_data_properties['hasIdentifier'], Literal(self.mock_id)))
+        self.target._g.add((self.class_instance, self._OWL_data_properties['hasCodeIdentifier'], Literal("Class")))
+        self.target._g.add((self.parent_class_instance, self._OWL_data_properties['hasIdentifier'], Literal(self.mock_id)))
+        self.target._g.add((self.parent_class_instance, self._OWL_data_properties['hasCodeIdentifier'], Literal("SuperClass")))
+        request_definition.return_value = [(1, 1, "file:///input/Class.java")]
+        unique_id.return_value = self.mock_id
+
+        self.assertIsNone(self.target.get_instance_from_lsp_definition(None, "Class"))
+        self.target.initializationPhase = False
+        self.assertEqual(self.target.get_instance_from_lsp_definition(None, "Class"), self.class_instance)
+        self.assertEqual(self.target.get_instance_from_lsp_definition(None, "SuperClass"), self.parent_class_instance)
+        self.assertIsNone(self.target.get_instance_from_lsp_definition(None, "Method"))
+        unique_id.assert_called_with("/input/Class.java", 1, 1)
+
+    def test_dry_walk(self):
+        """
+        Test that a dry walk records the language server requests and undoes its changes to the graph and the walk state
+        """
+        self.createClassAndMethodNodes(False)
+        self.target.initializationPhase = False
+        graph_size = len(self.target.get_graph())
+        file_instances = list(self.target.fileInstances)
+
+        self.target.start_dry_walk()
+        self.target.create_OWL_object_property_instance(self.method_instance, self.class_instance, "hasParent")
+        self.target.fileInstances.append(self.class_instance)
+        self.target.record_walk_undo(self.target.fileInstances.pop)
+        self.target.currentFileInstance = self.class_instance
+        self.assertEqual(self.target.request_definition_from_file_line_column("Class.java", 1, 2), [])
+        requests = self.target.end_dry_walk()
+
+        self.assertEqual(requests, [("definition", "Class.java", 1, 2)])
+        self.assertEqual(len(self.target.get_graph()), graph_size)
+        self.assertEqual(self.target.fileInstances, file_instances)
+        self.assertEqual(self.target.currentFileInstance, self.testFileInstance)
+
+    def test_file_fragment(self):
+        """
+        Test that a recorded file fragment is added again, and only while its node lookups give the same results
+        """
+        file_instance = self._custom_instances_namespace[f'Class.java_{self.mock_id}']
+        self.target.initializationPhase = True
+        self.target.start_recording_file_fragment()
+        self.target._g.add((file_instance, RDF.type, self._SEON_main.File))
+        self.target._g.add((self.class_instance, RDF.type, self._OWL_classes['ClassType']))
+        self.target._g.add((self.class_instance, self._OWL_data_properties['hasCodeIdentifier'], Literal("Class")))
+        self.assertEqual(self.target.get_instances_from_code_identifier("Class", class_name="ClassType"), [self.class_instance])
+        self.assertEqual(self.target.get_instances_from_code_identifier("SuperClass", class_name="ClassType"), [])
+        fragment = self.target.stop_recording_file_fragment()
+        self.assertEqual(len(fragment.triples), 3)
+
+        target = type(self.target)(None)
+        self.assertTrue(target.add_file_fragment("/input/Class.java", fragment))
+        self.assertTrue(set(fragment.triples) <= set(target.get_graph()))
+        self.assertEqual(target.currentFileInstance, file_instance)
+
+        # Another file declares SuperClass first, so the fragment does not match anymore.
+        target = type(self.target)(None)
+        target._g.add((self.parent_class_instance, RDF.type, self._OWL_classes['ClassType']))
+        target._g.add((self.parent_class_instance, self._OWL_data_properties['hasCodeIdentifier'], Literal("SuperClass")))
+        graph_size = len(target.get_graph())
+        self.assertFalse(target.add_file_fragment("/input/Class.java", fragment))
+        self.assertEqual(len(target.get_graph()), graph_size)
+
+    def test_listeners_do_not_share_state(self):
+        """
+        Test that two listeners in one process do not share the state of their walks or the classes they add
+        """
+        other_target = type(self.target)(None)
+        self.target.fileInstances.append(self.class_instance)
+        self.assertEqual(other_target.fileInstances, [])
+
+        self.target.initializationPhase = True
+        self.target.set_OWL_language_specifics("test", "http://test.moonshot.sep/_#", ["TestType"], [], [])
+        self.assertIn("TestType", self.target._OWL_classes)
+        self.assertNotIn("TestType", other_target._OWL_classes)
+        self.assertNotIn("TestType", type(self.target)(None)._OWL_classes)
+
     #
     # There are many more test cases that can be added here. 
     # These are related to the language server which we did not implement yet.
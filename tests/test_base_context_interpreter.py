@@ -1,4 +1,5 @@
 import re
+import hashlib
 from unittest.mock import patch, MagicMock
 from context_interpreter import ContextInterpreter
 from enum import Enum
@@ -36,6 +37,30 @@ class TestBaseContextInterpreter:
         id = self.target.create_deterministic_node_id_from_filename_line_column('test', 1, 1)
         self.assertEqual(id, '1_1_4886718345')
 
+    @patch('hashlib.sha256', wraps=hashlib.sha256)
+    def test_create_deterministic_node_id_hashes_filename_once(self, mock_sha256):
+        """
+        Test that the filename is hashed once for all node IDs in the file, and that compact IDs end with a short digest
+        """
+        self.target.create_deterministic_node_id_from_filename_line_column('test', 1, 1)
+        self.target.create_deterministic_node_id_from_filename_line_column('test', 2, 5)
+        self.assertEqual(mock_sha256.call_count, 1)
+
+        compact_target = ContextInterpreter(compact_ids=True)
+        id = compact_target.create_deterministic_node_id_from_filename_line_column('test', 2, 5)
+        self.assertTrue(re.match(r'^2_5_[a-z2-7]{16}$', id))
+
+    def test_create_deterministic_node_id_relative_to_root_path(self):
+        """
+        Test that node IDs of files under the root path do not depend on where the root path is
+        """
+        first_target = ContextInterpreter(root_path='/tmp/first/input')
+        second_target = ContextInterpreter(root_path='/tmp/second/input/')
+        id = first_target.create_deterministic_node_id_from_filename_line_column('/tmp/first/input/src/Square.java', 1, 0)
+        self.assertEqual(id, second_target.create_deterministic_node_id_from_filename_line_column('/tmp/second/input/src/Square.java', 1, 0))
+        self.assertEqual(id, ContextInterpreter().create_deterministic_node_id_from_filename_line_column('src/Square.java', 1, 0))
+        self.assertEqual(first_target.relative_file_path('/tmp/second/input/src/Square.java'), '/tmp/second/input/src/Square.java')
+
     @patch('hashlib.sha256')
     def test_create_deterministic_node_id(self, mock_sha256):
         """
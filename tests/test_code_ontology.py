@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from rdflib import Graph, Namespace, RDFS
+import code_ontology
+from code_ontology import CodeOntology
+
+## This class runs tests for the CodeOntology class in the code_ontology.py file.
+class TestCodeOntology(unittest.TestCase):
+    _SEON_code = Namespace("http://se-on.org/ontologies/domain-specific/2012/02/code.owl#")
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ontology_path = os.path.join(self.directory.name, "code.owl")
+        graph = Graph()
+        graph.add((self._SEON_code.ComplexType, RDFS.subClassOf, self._SEON_code.Datatype))
+        graph.add((self._SEON_code.PrimitiveType, RDFS.subClassOf, self._SEON_code.Datatype))
+        graph.add((self._SEON_code.ClassType, RDFS.subClassOf, self._SEON_code.ComplexType))
+        graph.serialize(destination=self.ontology_path, format="xml")
+
+    def tearDown(self):
+        CodeOntology.set_override_path(None)
+        self.directory.cleanup()
+
+    def test_from_graph(self):
+        """
+        Test that from_graph maps every class to its direct subclasses
+        """
+        ontology = CodeOntology.from_graph(Graph().parse(self.ontology_path, format="xml"))
+        self.assertCountEqual(ontology.direct_sub_classes[self._SEON_code.Datatype], [self._SEON_code.ComplexType, self._SEON_code.PrimitiveType])
+        self.assertEqual(ontology.direct_sub_classes[self._SEON_code.ComplexType], [self._SEON_code.ClassType])
+
+    def test_override_path(self):
+        """
+        Test that the ontology at the override path is loaded once and shared
+        """
+        CodeOntology.set_override_path(self.ontology_path)
+        ontology = CodeOntology.get()
+        self.assertEqual(ontology.direct_sub_classes[self._SEON_code.ComplexType], [self._SEON_code.ClassType])
+        self.assertIs(CodeOntology.get(), ontology)
+
+    def test_cached_class_hierarchy(self):
+        """
+        Test that a cached class hierarchy is loaded without parsing an ontology
+        """
+        ontology = CodeOntology.from_graph(Graph().parse(self.ontology_path, format="xml"))
+        ontology._save(os.path.join(self.directory.name, "code-class-hierarchy.pickle"))
+        with patch.object(code_ontology, "BUNDLED_CODE_ONTOLOGY_PATH", os.path.join(self.directory.name, "missing.owl")), \
+             patch.dict(os.environ, {code_ontology.ONTOLOGY_PATH_ENVIRONMENT_VARIABLE: ""}), \
+             patch.object(Graph, "parse", side_effect=AssertionError("The ontology should not be parsed")):
+            loaded = CodeOntology._load(self.directory.name)
+        self.assertEqual(loaded.direct_sub_classes, ontology.direct_sub_classes)
+
+    def test_bundled_ontology(self):
+        """
+        Test that the ontology bundled with the tool is loaded without the network
+        """
+        parse = Graph.parse
+        with patch.dict(os.environ, {code_ontology.ONTOLOGY_PATH_ENVIRONMENT_VARIABLE: ""}), \
+             patch.object(Graph, "parse", autospec=True, side_effect=parse) as mocked_parse:
+            ontology = CodeOntology._load(self.directory.name)
+        self.assertEqual([call.args[1] for call in mocked_parse.call_args_list], [code_ontology.BUNDLED_CODE_ONTOLOGY_PATH])
+        self.assertEqual(ontology.direct_sub_classes[self._SEON_code.ClassType], [self._SEON_code.ExceptionType])
+        self.assertIn(self._SEON_code.Method, ontology.direct_sub_classes[self._SEON_code.CodeEntity])
+
+    def test_download_error(self):
+        """
+        Test that a clear error is raised if the ontology is neither bundled nor cached, and can not be downloaded
+        """
+        with patch.object(code_ontology, "BUNDLED_CODE_ONTOLOGY_PATH", os.path.join(self.directory.name, "missing.owl")), \
+             patch.dict(os.environ, {code_ontology.ONTOLOGY_PATH_ENVIRONMENT_VARIABLE: ""}), \
+             patch.object(Graph, "parse", side_effect=OSError("Network is unreachable")):
+            with self.assertRaisesRegex(Exception, "could not be downloaded from .*--ontology"):
+                CodeOntology._load(self.directory.name)
+
+if __name__ == '__main__':
+    unittest.main()
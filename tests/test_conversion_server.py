@@ -0,0 +1,86 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+import urllib.request
+import urllib.error
+from unittest.mock import patch
+from conversion_server import ConversionServer
+
+## This class runs tests for the ConversionServer class in the conversion_server.py file.
+class TestConversionServer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, "upload.zip")
+        open(self.input_path, 'wb').close()
+        self.server = ConversionServer(("127.0.0.1", 0), ["--jobs", "2"], os.path.join(self.directory.name, "output"))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.assertFalse(os.path.exists(self.server.workspace_path))
+        self.directory.cleanup()
+
+    @patch('conversion_server.convert_input')
+    def test_convert(self, convert_input):
+        """
+        Test that a conversion is run with the arguments of the server and of the request, and that the output path is returned
+        """
+        status, response = self.post({"input": self.input_path, "arguments": ["--output-format", "nt"]})
+        self.assertEqual(status, 200)
+        arguments, input_folder_path, language_servers = convert_input.call_args.args
+        self.assertEqual(arguments.input_directory_or_zip_path, self.input_path)
+        self.assertEqual((arguments.jobs, arguments.output_format), (2, "nt"))
+        self.assertEqual(response["output"], arguments.output_file_path)
+        self.assertTrue(response["output"].startswith(os.path.join(self.directory.name, "output", "upload-")))
+        self.assertEqual(self.server.conversions, 1)
+
+        # Every conversion uses the workspace folder and the language servers of the server.
+        self.post({"input": self.input_path})
+        self.assertEqual(convert_input.call_args.args[1:], (input_folder_path, language_servers))
+        self.assertEqual(language_servers.root_path, input_folder_path)
+        self.assertTrue(input_folder_path.startswith(self.server.workspace_path))
+
+    @patch('conversion_server.CodeOntology')
+    @patch('conversion_server.convert_input')
+    def test_ontology_of_request(self, convert_input, code_ontology):
+        """
+        Test that the ontology a request asks for is only used for that request
+        """
+        ontology_path = os.path.join(self.directory.name, "code.owl")
+        self.assertEqual(self.post({"input": self.input_path, "arguments": ["--ontology", ontology_path]})[0], 200)
+        self.assertEqual(convert_input.call_args.args[0].ontology, ontology_path)
+        code_ontology.set_override_path.assert_called_once_with(None)
+
+        code_ontology.reset_mock()
+        self.assertEqual(self.post({"input": self.input_path})[0], 200)
+        code_ontology.set_override_path.assert_not_called()
+
+    @patch('conversion_server.convert_input')
+    def test_invalid_requests(self, convert_input):
+        """
+        Test that requests with a missing input or invalid arguments are rejected without running a conversion
+        """
+        self.assertEqual(self.post({"input": os.path.join(self.directory.name, "missing.zip")})[0], 400)
+        self.assertEqual(self.post({"input": self.input_path, "arguments": ["--unknown"]})[0], 400)
+        self.assertEqual(self.post(["not", "an", "object"])[0], 400)
+        convert_input.assert_not_called()
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "output")))
+
+    ### BEGIN HELPER METHODS ###
+
+    def post(self, body):
+        request = urllib.request.Request(f"http://127.0.0.1:{self.server.server_address[1]}/convert", data=json.dumps(body).encode('utf-8'), method="POST")
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
+import os
+import tempfile
 import unittest
 from test_base_class import TestBaseClass
 from test_base_context_interpreter import Context
 from antlr4 import FileStream, CommonTokenStream
 from antlr_generated_code.cpp.CPP14Lexer import CPP14Lexer
 from antlr_generated_code.cpp.CPP14Parser import CPP14Parser
+from listeners.base.CPPListenerBase import CPPListenerBase
+from rdflib import RDF
 
 class TestCPPListener(TestBaseClass, unittest.TestCase):
     testFilePath = 'tests/cpp_test.cpp'
@@ -46,3 +50,44 @@ class TestCPPListener(TestBaseClass, unittest.TestCase):
     
     def getMethodFromContext(self, ctx):
         return ctx.declarator().pointerDeclarator().noPointerDeclarator().noPointerDeclarator()
+
+    def test_get_included_header_file_instances(self):
+        """
+        Test that include directives are resolved to the parsed header files, relative to the including file first and otherwise only to a unique match
+        """
+        listener = CPPListenerBase(None)
+        with tempfile.TemporaryDirectory() as directory:
+            headers = {}
+            for header in ["src/shape.h", "include/shape.h", "include/geo/circle.hpp", "other/util.h"]:
+                headers[header] = self._custom_instances_namespace[f'{header}_{self.mock_id}']
+                listener.currentFileInstance = headers[header]
+                listener.register_header_file(os.path.join(directory, header))
+            source_path = os.path.join(directory, "src", "shape.cpp")
+            os.makedirs(os.path.dirname(source_path))
+            with open(source_path, 'w') as f:
+                f.write('#include "shape.h"\n  #  include <geo/circle.hpp>\n#include <vector>\n\nint x;\n#include "util.h"\n')
+            listener.currentFileInstance = self._custom_instances_namespace[f'src/shape.cpp_{self.mock_id}']
+
+            self.assertEqual(listener.get_included_header_file_instances(source_path, 4), [headers["src/shape.h"], headers["include/geo/circle.hpp"]])
+            self.assertEqual(listener.get_included_header_file_instances(source_path, 5)[-1], headers["other/util.h"])
+
+            # An include that several header files match is not resolved to any of them.
+            listener.currentFileInstance = self._custom_instances_namespace[f'lib/util.h_{self.mock_id}']
+            listener.register_header_file(os.path.join(directory, "lib", "util.h"))
+            listener.currentFileInstance = self._custom_instances_namespace[f'src/shape.cpp_{self.mock_id}']
+            self.assertEqual(listener.get_included_header_file_instances(source_path, 5), [headers["src/shape.h"], headers["include/geo/circle.hpp"]])
+
+    def test_is_possible_member_access_target(self):
+        """
+        Test that only names of fields and methods of the codebase are member access targets to ask the language server about
+        """
+        listener = CPPListenerBase(None)
+        listener.create_OWL_data_property_instance(self.method_instance, "hasCodeIdentifier", "area")
+        listener._g.add((self.method_instance, RDF.type, self._SEON_code.Method))
+        listener.create_OWL_data_property_instance(self.class_instance, "hasCodeIdentifier", "Circle")
+        listener._g.add((self.class_instance, RDF.type, self._SEON_code.ClassType))
+        listener.initializationPhase = False
+
+        self.assertTrue(listener.is_possible_member_access_target("area"))
+        self.assertFalse(listener.is_possible_member_access_target("Circle"))
+        self.assertFalse(listener.is_possible_member_access_target("size"))
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from antlr4 import CommonTokenStream
+from antlr4.dfa.DFA import DFA
+from antlr_generated_code.java.JavaLexer import JavaLexer
+from antlr_generated_code.java.JavaParser import JavaParser
+from dfa_cache import DFACache
+from input_manifest import ArchiveMemberStream
+
+## This class runs tests for the DFACache class in the dfa_cache.py file.
+class TestDFACache(unittest.TestCase):
+    java_code = "package a.b;\nimport java.util.List;\nclass Square extends Shape {\n    private int side;\n    int area(List<Integer> l) { return side * side + l.get(0); }\n}\n"
+
+    def setUp(self):
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.cache = DFACache(self.cache_directory.name)
+
+    def tearDown(self):
+        for recognizer_class in (JavaLexer, JavaParser):
+            if "_loaded_dfa_cache" in recognizer_class.__dict__:
+                del recognizer_class._loaded_dfa_cache
+        self.cache_directory.cleanup()
+
+    def test_load_restores_dfa_states(self):
+        """
+        Test that parsing with loaded DFAs finds every DFA state it needs in the cache
+        """
+        self.parse()
+        self.cache.save_recognizer(JavaParser)
+        expected_state_counts = [len(dfa._states) for dfa in JavaParser.decisionsToDFA]
+
+        self.clear_dfas(JavaParser)
+        self.assertTrue(self.cache.load_recognizer(JavaParser))
+        self.assertEqual([len(dfa._states) for dfa in JavaParser.decisionsToDFA], expected_state_counts)
+        self.parse()
+        self.assertEqual([len(dfa._states) for dfa in JavaParser.decisionsToDFA], expected_state_counts)
+
+    def test_load_without_cache_file(self):
+        """
+        Test that loading returns False and keeps the DFAs if nothing was saved for the grammar
+        """
+        dfas = list(JavaLexer.decisionsToDFA)
+        self.assertFalse(self.cache.load_recognizer(JavaLexer))
+        self.assertEqual(JavaLexer.decisionsToDFA, dfas)
+
+    def test_cache_file_depends_on_grammar(self):
+        """
+        Test that recognizers of different grammars use different cache files
+        """
+        self.assertNotEqual(self.cache.get_cache_file_path(JavaLexer), self.cache.get_cache_file_path(JavaParser))
+
+    ### BEGIN HELPER METHODS ###
+
+    def parse(self):
+        parser = JavaParser(CommonTokenStream(JavaLexer(ArchiveMemberStream("test_file", self.java_code))))
+        return parser.compilationUnit()
+
+    def clear_dfas(self, recognizer_class):
+        recognizer_class.decisionsToDFA[:] = [DFA(state, i) for i, state in enumerate(recognizer_class.atn.decisionToState)]
+
+if __name__ == '__main__':
+    unittest.main()
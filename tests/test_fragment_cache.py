@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from rdflib import Namespace, Literal, RDF
+from fragment_cache import FragmentCache, FileFragment
+from supported_language import SupportedLanguage
+
+## This class runs tests for the FragmentCache class in the fragment_cache.py file.
+class TestFragmentCache(unittest.TestCase):
+    _custom_instances_namespace = Namespace("http://instances.moonshot.sep/_#")
+    _SEON_code = Namespace("http://se-on.org/ontologies/domain-specific/2012/02/code.owl#")
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.language = SupportedLanguage.fromName("Java")
+        self.square = self._custom_instances_namespace["Square_1_0_1"]
+        self.fragment = FileFragment([(self.square, RDF.type, self._SEON_code.ClassType), (self.square, self._SEON_code.hasCodeIdentifier, Literal("Square"))],
+                                     [(0, ("a.b", "JavaPackage", None, None, None), [])])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reuses_fragments_of_unchanged_files(self):
+        """
+        Test that a saved fragment is loaded by a later run if the file has the same path and content
+        """
+        cache = FragmentCache(self.directory.name)
+        cache.load_fragments(self.language, ["/input/Square.java"], [b"class Square {}"])
+        self.assertIsNone(cache.get_fragment("/input/Square.java"))
+        cache.save_fragment("/input/Square.java", self.fragment)
+
+        cache = FragmentCache(self.directory.name)
+        cache.load_fragments(self.language, ["/input/Square.java"], [b"class Square {}"])
+        fragment = cache.get_fragment("/input/Square.java")
+        self.assertEqual(fragment.triples, self.fragment.triples)
+        self.assertEqual(fragment.lookups, self.fragment.lookups)
+
+    def test_ignores_fragments_of_changed_files(self):
+        """
+        Test that a saved fragment is not loaded if the content or path of the file or the node ID setting changed
+        """
+        cache = FragmentCache(self.directory.name)
+        cache.load_fragments(self.language, ["/input/Square.java"], [b"class Square {}"])
+        cache.save_fragment("/input/Square.java", self.fragment)
+
+        cache = FragmentCache(self.directory.name)
+        cache.load_fragments(self.language, ["/input/Square.java", "/other/Square.java"], [b"class Square { int side; }", b"class Square {}"])
+        cache.load_fragments(self.language, ["/input/Square.java"], [b"class Square {}"], compact_ids=True)
+        self.assertIsNone(cache.get_fragment("/input/Square.java"))
+        self.assertIsNone(cache.get_fragment("/other/Square.java"))
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
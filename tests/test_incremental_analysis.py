@@ -0,0 +1,125 @@
+import os
+import re
+import io
+import tempfile
+import contextlib
+import unittest
+from unittest.mock import patch
+from rdflib import Graph, Namespace, Literal, RDF
+from context_interpreter import ContextInterpreter
+from incremental_analysis import IncrementalAnalysis
+from main import parse_arguments, run
+
+## This class runs tests for the IncrementalAnalysis class in the incremental_analysis.py file.
+class TestIncrementalAnalysis(unittest.TestCase):
+    _custom_instances_namespace = Namespace("http://instances.moonshot.sep/_#")
+    _SEON_code = Namespace("http://se-on.org/ontologies/domain-specific/2012/02/code.owl#")
+
+    def setUp(self):
+        self.files = ["/input/src/Square.java", "/input/src/Shape.java", "/input/src/Lonely.java"]
+        context_interpreter = ContextInterpreter()
+        self.square, self.shape, self.lonely = [self._custom_instances_namespace[f"Class_{context_interpreter.create_deterministic_node_id_from_filename_line_column(file_path, 1, 0)}"] for file_path in self.files]
+        self.string = self._custom_instances_namespace[f"Class_{context_interpreter.create_deterministic_node_id_from_code_identifier('String', 'JavaListener.Class')}"]
+        self.previous_graph = Graph()
+        self.previous_graph.add((self.square, RDF.type, self._SEON_code.Class))
+        self.previous_graph.add((self.square, self._SEON_code.hasCodeIdentifier, Literal("Square")))
+        self.previous_graph.add((self.square, self._SEON_code.hasSuperClass, self.shape))
+        self.previous_graph.add((self.shape, RDF.type, self._SEON_code.Class))
+        self.previous_graph.add((self.lonely, RDF.type, self._SEON_code.Class))
+        self.previous_graph.add((self.lonely, self._SEON_code.hasSuperClass, self.string))
+
+    def test_get_affected_files(self):
+        """
+        Test that the changed files and the files that had an edge to or from them are affected, and not the others
+        """
+        incremental_analysis = IncrementalAnalysis(self.previous_graph, ["/input/src/Shape.java"])
+        self.assertEqual(incremental_analysis.get_affected_files(self.files), {"/input/src/Square.java", "/input/src/Shape.java"})
+
+        # A deleted file is not walked, but the files with edges to it are.
+        incremental_analysis = IncrementalAnalysis(self.previous_graph, ["/input/src/Shape.java"])
+        self.assertEqual(incremental_analysis.get_affected_files(self.files[:1]), {"/input/src/Square.java"})
+
+    def test_get_reused_triples(self):
+        """
+        Test that only the triples that do not involve a node of a changed file are reused
+        """
+        incremental_analysis = IncrementalAnalysis(self.previous_graph, ["/input/src/Shape.java"])
+        self.assertCountEqual(incremental_analysis.get_reused_triples(), [
+            (self.square, RDF.type, self._SEON_code.Class),
+            (self.square, self._SEON_code.hasCodeIdentifier, Literal("Square")),
+            (self.lonely, RDF.type, self._SEON_code.Class),
+            (self.lonely, self._SEON_code.hasSuperClass, self.string)])
+
+    @patch('rdf_creation.SyncLanguageServer')
+    def test_references_to_unchanged_files(self, language_server):
+        """
+        Test that an incremental run creates the edges of a changed file to a field of a file that is not walked again, like a full run
+        """
+        language_server.create.side_effect = StubLanguageServer
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input")
+            self.write_file(input_path, "q/Y.java", "package q;\n\npublic class Y {\n    public static int f;\n}\n")
+            self.write_file(input_path, "p/X.java", "package p;\n\npublic class X {\n    void m() {\n    }\n}\n")
+            self.convert(input_path, os.path.join(directory, "previous.nt"), directory)
+            self.write_file(input_path, "p/X.java", "package p;\n\npublic class X {\n    void m() {\n        q.Y.f = 1;\n    }\n}\n")
+            self.write_file(directory, "changed.txt", "p/X.java\n")
+            full_graph = self.convert(input_path, os.path.join(directory, "full.nt"), directory)
+            incremental_graph = self.convert(input_path, os.path.join(directory, "incremental.nt"), directory,
+                                             "--previous-output", os.path.join(directory, "previous.nt"), "--changed-files", os.path.join(directory, "changed.txt"))
+            # The reused triples that were created again are not written twice.
+            with open(os.path.join(directory, "incremental.nt"), encoding='utf-8') as file:
+                self.assertEqual(len(file.read().splitlines()), len(incremental_graph))
+
+        field, method = [next(full_graph.subjects(self._SEON_code.hasCodeIdentifier, Literal(name))) for name in ["f", "m"]]
+        x, y = [next(full_graph.subjects(self._SEON_code.hasCodeIdentifier, Literal(name))) for name in ["X", "Y"]]
+        for triple in [(method, self._SEON_code.accessesField, field), (field, self._SEON_code.isAccessedBy, method), (x, self._SEON_code.usesComplexType, y)]:
+            self.assertIn(triple, full_graph)
+            self.assertIn(triple, incremental_graph)
+        self.assertEqual(set(full_graph), set(incremental_graph))
+
+    ### BEGIN HELPER METHODS ###
+
+    def write_file(self, root_path, file_name, content):
+        os.makedirs(os.path.dirname(os.path.join(root_path, file_name)), exist_ok=True)
+        with open(os.path.join(root_path, file_name), 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def convert(self, input_path, output_path, directory, *extra_arguments):
+        arguments = parse_arguments(["main", input_path, output_path, "--output-format", "nt", "--fragment-cache", os.path.join(directory, "fragments"), *extra_arguments])
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(arguments)
+        return Graph().parse(output_path, format="nt")
+
+class StubLanguageServer:
+    """Language server that finds no definitions, and the references of a name by searching the Java files for the name."""
+
+    def __init__(self, config, logger, repository_root_path):
+        self.repository_root_path = repository_root_path
+
+    @contextlib.contextmanager
+    def start_server(self):
+        yield self
+
+    def request_definition(self, file_name, line, column):
+        return []
+
+    def request_references(self, file_name, line, column):
+        with open(os.path.join(self.repository_root_path, file_name), encoding='utf-8') as file:
+            name = next((match.group() for match in re.finditer(r"\w+", file.read().split("\n")[line]) if match.start() <= column <= match.end()), None)
+        references = []
+        if name is None:
+            return references
+        for root, _, file_names in os.walk(self.repository_root_path):
+            for reference_file_name in file_names:
+                reference_path = os.path.join(root, reference_file_name)
+                if not reference_path.endswith(".java"):
+                    continue
+                with open(reference_path, encoding='utf-8') as file:
+                    for reference_line, text in enumerate(file.read().split("\n")):
+                        for match in re.finditer(rf"\b{name}\b", text):
+                            if (reference_path, reference_line) != (os.path.join(self.repository_root_path, file_name), line):
+                                references.append({"uri": f"file://{reference_path}", "range": {"start": {"line": reference_line, "character": match.start()}}})
+        return references
+
+if __name__ == '__main__':
+    unittest.main()
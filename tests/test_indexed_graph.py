@@ -0,0 +1,97 @@
+import unittest
+from rdflib import Graph, Dataset, Namespace, Literal, RDF
+from indexed_graph import IndexedGraph
+
+## This class runs tests for the IndexedGraph class in the indexed_graph.py file.
+class TestIndexedGraph(unittest.TestCase):
+    _custom_instances_namespace = Namespace("http://instances.moonshot.sep/_#")
+    _SEON_code = Namespace("http://se-on.org/ontologies/domain-specific/2012/02/code.owl#")
+
+    def setUp(self):
+        self.graph = IndexedGraph()
+        self.method = self._custom_instances_namespace["area_1_1_1"]
+        self.square = self._custom_instances_namespace["Square_1_1_2"]
+        self.graph.add((self.method, RDF.type, self._SEON_code.Method))
+        self.graph.add((self.method, self._SEON_code.hasCodeIdentifier, Literal("area")))
+        self.graph.add((self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+
+    def test_add(self):
+        """
+        Test that added triples can be looked up by subject and predicate, and by predicate and object
+        """
+        self.assertEqual(self.graph.get_objects(self.method, RDF.type), [self._SEON_code.Method])
+        self.assertEqual(self.graph.get_subjects(self._SEON_code.hasCodeIdentifier, Literal("area")), [self.method])
+        self.assertTrue(self.graph.has_triple(self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+        self.assertEqual(self.graph.get_objects(self.square, RDF.type), [])
+
+    def test_add_graph(self):
+        """
+        Test that triples added from another graph are indexed
+        """
+        other = Graph()
+        other.add((self.square, RDF.type, self._SEON_code.ClassType))
+        self.graph += other
+        self.assertEqual(self.graph.get_subjects(RDF.type, self._SEON_code.ClassType), [self.square])
+
+    def test_remove(self):
+        """
+        Test that removed triples, also those matching a pattern, are removed from the indexes
+        """
+        self.graph.remove((self.method, self._SEON_code.hasCodeIdentifier, None))
+        self.assertEqual(self.graph.get_subjects(self._SEON_code.hasCodeIdentifier, Literal("area")), [])
+        self.assertEqual(self.graph.get_objects(self.method, RDF.type), [self._SEON_code.Method])
+        self.assertEqual(len(self.graph), 2)
+
+    def test_rollback_journal(self):
+        """
+        Test that rolling back the journal undoes the additions and removals since it was started
+        """
+        self.graph.start_journal()
+        self.graph.add((self.square, RDF.type, self._SEON_code.ClassType))
+        self.graph.add((self.method, RDF.type, self._SEON_code.Method))
+        self.graph.remove((self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+        self.graph.rollback_journal()
+
+        self.assertEqual(self.graph.get_objects(self.square, RDF.type), [])
+        self.assertEqual(self.graph.get_objects(self.method, RDF.type), [self._SEON_code.Method])
+        self.assertTrue(self.graph.has_triple(self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+        self.assertEqual(len(self.graph), 3)
+
+    def test_pop_new_triples(self):
+        """
+        Test that each triple of the graph is popped once, and not at all if it was rolled back before it was popped
+        """
+        self.graph.start_collecting_new_triples()
+        self.assertEqual(len(self.graph.pop_new_triples()), 3)
+
+        self.graph.start_journal()
+        self.graph.add((self.square, RDF.type, self._SEON_code.ClassType))
+        self.graph.rollback_journal()
+        self.graph.add((self.method, RDF.type, self._SEON_code.Method))
+        self.graph.add((self.square, self._SEON_code.hasCodeIdentifier, Literal("Square")))
+        self.assertEqual(self.graph.pop_new_triples(), [(self.square, self._SEON_code.hasCodeIdentifier, Literal("Square"))])
+        self.assertEqual(self.graph.pop_new_triples(), [])
+
+    def test_shared_store(self):
+        """
+        Test that graphs sharing a store store the triples once, but only look up the triples that were added through them
+        """
+        other_graph = IndexedGraph(store=self.graph.store)
+        other_graph.add((self.square, self._SEON_code.hasCodeIdentifier, Literal("area")))
+        other_graph.add((self.method, RDF.type, self._SEON_code.Method))
+
+        self.assertEqual((len(self.graph), len(other_graph)), (3, 2))
+        self.assertEqual(len(Dataset(store=self.graph.store, default_union=True)), 4)
+        self.assertEqual(self.graph.get_subjects(self._SEON_code.hasCodeIdentifier, Literal("area")), [self.method])
+        self.assertEqual(other_graph.get_subjects(self._SEON_code.hasCodeIdentifier, Literal("area")), [self.square])
+
+        # Rolling back the journal of one graph does not remove triples of the other graph.
+        other_graph.start_journal()
+        other_graph.add((self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+        other_graph.rollback_journal()
+        self.assertTrue(self.graph.has_triple(self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+        self.assertFalse(other_graph.has_triple(self.method, self._SEON_code.isDeclaredMethodOf, self.square))
+        self.assertEqual(len(self.graph), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from input_manifest import InputManifest
+
+## This class runs tests for the InputManifest class in the input_manifest.py file.
+class TestInputManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.directory.name, "input.zip")
+        self.root_path = os.path.join(self.directory.name, "input")
+        with zipfile.ZipFile(self.zip_path, 'w') as archive:
+            for name in ["src/a/Square.java", "src/b/shape.hh", "pom.xml", "build.gradle.kts", "build/compile_commands.json", "CMakeLists.txt",
+                         ".settings/org.eclipse.jdt.core.prefs", "logo.png", "lib/guava.jar", "lib/java.base.jmod", "data/model.bin", "README.md",
+                         "target/classes/a/Square.class", "target/generated/Config.java", "build/generated/Config.java", "build/main.o",
+                         "bin/a/Square.class", "out/production/Square.java", "dist/app.cpp"]:
+                archive.writestr(name, "content")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_materialize_project_files(self):
+        """
+        Test that zip-native mode writes the source files and the project and build descriptors to disk, but no other files or build outputs
+        """
+        manifest = InputManifest.from_zip(self.zip_path, self.root_path)
+        self.assertEqual(os.listdir(self.root_path), [])
+
+        manifest.materialize_project_files()
+        manifest.close()
+        written_files = sorted(os.path.relpath(os.path.join(root, filename), self.root_path).replace(os.sep, '/')
+                               for root, _, filenames in os.walk(self.root_path) for filename in filenames)
+        self.assertEqual(written_files, [".settings/org.eclipse.jdt.core.prefs", "CMakeLists.txt", "build.gradle.kts", "build/compile_commands.json",
+                                         "pom.xml", "src/a/Square.java", "src/b/shape.hh"])
+
+if __name__ == '__main__':
+    unittest.main()
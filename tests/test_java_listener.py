@@ -1,9 +1,11 @@
 import unittest
+from types import SimpleNamespace
 from test_base_class import TestBaseClass
 from test_base_context_interpreter import Context
 from antlr4 import FileStream, CommonTokenStream
 from antlr_generated_code.java.JavaLexer import JavaLexer
 from antlr_generated_code.java.JavaParser import JavaParser
+from listeners.base.JavaListenerBase import JavaListenerBase
 
 class TestJavaListener(TestBaseClass, unittest.TestCase):
     testFilePath = 'tests/java_test.java'
@@ -46,3 +48,52 @@ class TestJavaListener(TestBaseClass, unittest.TestCase):
     
     def getMethodName(self, ctx):
         return ctx.identifier().getText()
+
+    def test_pop_field_references_in_span(self):
+        """
+        Test that the first reference to each field within a span is removed and returned, in the order the fields were added
+        """
+        listener = JavaListenerBase(None)
+        field_1, field_2 = self.datatype_instance_1, self.datatype_instance_2
+        listener.add_field_references(field_1, [("A.java", 5, 20), ("A.java", 3, 8), ("B.java", 4, 0)])
+        listener.add_field_references(field_2, [("A.java", 2, 4), ("A.java", 4, 1)])
+
+        span = (SimpleNamespace(line=2, column=10), SimpleNamespace(line=5, column=20))
+        self.assertEqual(listener.pop_field_references_in_span("A.java", *span), [field_1, field_2])
+        self.assertEqual(listener.pop_field_references_in_span("A.java", *span), [field_1])
+        self.assertEqual(listener.pop_field_references_in_span("A.java", *span), [])
+        self.assertEqual([reference[:2] for reference in listener.fieldReferencesByFile["A.java"]], [(2, 4)])
+
+    def test_dry_walk_undoes_field_references(self):
+        """
+        Test that a dry walk undoes its changes to the field references and constructors without copying them
+        """
+        listener = JavaListenerBase(None)
+        field_1, field_2 = self.datatype_instance_1, self.datatype_instance_2
+        listener.add_field_references(field_1, [("A.java", 5, 20), ("A.java", 3, 8)])
+        references, field_numbers = {file_name: list(references) for file_name, references in listener.fieldReferencesByFile.items()}, dict(listener.fieldNumbers)
+        self.assertNotIn("fieldReferencesByFile", listener.get_walk_state())
+
+        listener.initializationPhase = False
+        listener.start_dry_walk()
+        listener.add_field_references(field_2, [("A.java", 4, 1), ("B.java", 1, 0)])
+        listener.add_field_references(field_1, [("A.java", 1, 0)])
+        listener.pop_field_references_in_span("A.java", SimpleNamespace(line=1, column=0), SimpleNamespace(line=5, column=20))
+        listener.set_walk_index_item(listener.constructorDictionary, self.mock_id, self.method_instance)
+        listener.end_dry_walk()
+
+        self.assertEqual(listener.fieldReferencesByFile, references)
+        self.assertEqual(listener.fieldNumbers, field_numbers)
+        self.assertEqual(listener.constructorDictionary, {})
+
+    def test_get_nested_package_pairs(self):
+        """
+        Test that each package is nested in the package with the longest name that its name starts with
+        """
+        listener = JavaListenerBase(None)
+        packages = {name: self._custom_instances_namespace[f'{name}_{self.mock_id}'] for name in ["a", "a.b", "a.b.c.d", "a.e", "x.y"]}
+        for name, instance in packages.items():
+            listener.add_package_to_trie(name, instance)
+
+        expected_pairs = [(packages["a"], packages["a.b"]), (packages["a.b"], packages["a.b.c.d"]), (packages["a"], packages["a.e"])]
+        self.assertCountEqual(listener.get_nested_package_pairs(), expected_pairs)
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from language_server_cache import LanguageServerCache
+
+## This class runs tests for the LanguageServerCache class in the language_server_cache.py file.
+class TestLanguageServerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root_path = os.path.join(self.directory.name, "input")
+        self.cache_file_path = os.path.join(self.directory.name, "cache", "Java.pickle")
+        self.files = [self.write_file("a/Square.java", "class Square extends Shape {}"), self.write_file("a/Shape.java", "class Shape {}")]
+        self.definition = [(1, 6, "file://" + os.path.join(self.root_path, "a", "Shape.java"))]
+        self.references = [(1, 21, "file://" + os.path.join(self.root_path, "a", "Square.java"))]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memoizes_requests(self):
+        """
+        Test that a repeated request is answered from the cache, also if the file name is absolute
+        """
+        cache = LanguageServerCache(self.root_path)
+        self.assertIsNone(cache.get("definition", "a/Square.java", 0, 21))
+        cache.put("definition", "a/Square.java", 0, 21, self.definition)
+        self.assertEqual(cache.get("definition", os.path.join(self.root_path, "a", "Square.java"), 0, 21), self.definition)
+        self.assertIsNone(cache.get("references", "a/Square.java", 0, 21))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_reuses_responses_of_unchanged_files(self):
+        """
+        Test that saved responses are reused by a later run if the files did not change, wherever the input is extracted
+        """
+        self.save_responses()
+        os.rename(self.root_path, self.root_path + "_moved")
+        self.root_path += "_moved"
+        moved_files = [file_path.replace("input", "input_moved") for file_path in self.files]
+
+        cache = LanguageServerCache()
+        cache.load(self.cache_file_path, self.root_path, moved_files)
+        self.assertEqual(cache.get("definition", "a/Square.java", 0, 21), [(1, 6, "file://" + os.path.join(self.root_path, "a", "Shape.java"))])
+        self.assertEqual(cache.get("references", "a/Shape.java", 0, 6), [(1, 21, "file://" + os.path.join(self.root_path, "a", "Square.java"))])
+        self.assertEqual(cache.persisted_hits, 2)
+
+    def test_ignores_responses_of_changed_files(self):
+        """
+        Test that a definition is not reused if the file it points to changed, and references not if any file changed
+        """
+        self.save_responses()
+        self.write_file("a/Shape.java", "class Shape { int area; }")
+
+        cache = LanguageServerCache()
+        cache.load(self.cache_file_path, self.root_path, self.files)
+        self.assertIsNone(cache.get("definition", "a/Square.java", 0, 21))
+        self.assertIsNone(cache.get("references", "a/Shape.java", 0, 6))
+        self.assertEqual(cache.persisted_hits, 0)
+
+    def test_ignores_definitions_outside_of_input_after_files_changed(self):
+        """
+        Test that an empty definition, or one outside of the input, is not reused once a file was added
+        """
+        cache = LanguageServerCache()
+        cache.load(self.cache_file_path, self.root_path, self.files)
+        cache.put("definition", "a/Square.java", 0, 21, [])
+        cache.put("definition", "a/Square.java", 0, 0, [(10, 4, "file:///usr/lib/jvm/src/java/lang/Object.java")])
+        cache.save(self.cache_file_path)
+        self.files.append(self.write_file("a/Circle.java", "class Circle extends Shape {}"))
+
+        cache = LanguageServerCache()
+        cache.load(self.cache_file_path, self.root_path, self.files)
+        self.assertIsNone(cache.get("definition", "a/Square.java", 0, 21))
+        self.assertIsNone(cache.get("definition", "a/Square.java", 0, 0))
+
+    def test_save_keeps_responses_of_other_projects(self):
+        """
+        Test that runs of different projects sharing a cache file do not overwrite each other's responses
+        """
+        self.save_responses()
+        other_root_path = os.path.join(self.directory.name, "other")
+        other_file = os.path.join(other_root_path, "b", "Main.java")
+        os.makedirs(os.path.dirname(other_file))
+        with open(other_file, 'w') as f:
+            f.write("class Main {}")
+        other_cache = LanguageServerCache()
+        other_cache.load(self.cache_file_path, other_root_path, [other_file])
+        other_cache.put("references", "b/Main.java", 0, 6, [])
+        other_cache.save(self.cache_file_path)
+
+        cache = LanguageServerCache()
+        cache.load(self.cache_file_path, self.root_path, self.files)
+        self.assertEqual(cache.get("definition", "a/Square.java", 0, 21), self.definition)
+
+    ### BEGIN HELPER METHODS ###
+
+    def write_file(self, file_name, content):
+        file_path = os.path.join(self.root_path, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        return file_path
+
+    def save_responses(self):
+        cache = LanguageServerCache()
+        cache.load(self.cache_file_path, self.root_path, self.files)
+        cache.put("definition", "a/Square.java", 0, 21, self.definition)
+        cache.put("references", "a/Shape.java", 0, 6, self.references)
+        cache.save(self.cache_file_path)
+
+if __name__ == '__main__':
+    unittest.main()
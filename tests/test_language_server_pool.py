@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from language_server_pool import LanguageServerPool, FILE_CREATED, FILE_CHANGED, FILE_DELETED
+from supported_language import SupportedLanguage
+
+## This class runs tests for the LanguageServerPool class in the language_server_pool.py file.
+class TestLanguageServerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root_path = self.directory.name
+        self.java = SupportedLanguage.fromName("java")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('language_server_pool.create_language_server')
+    def test_get(self, create_language_server):
+        """
+        Test that the language server is started once, and told about the files that changed since it was last used
+        """
+        lsp = create_language_server.return_value
+        lsp.loop.call_soon_threadsafe.side_effect = lambda callback, *arguments: callback(*arguments)
+        notify = lsp.language_server.server.notify.did_change_watched_files
+        self.write_file("a/Square.java", "class Square {}")
+        self.write_file("a/Shape.java", "class Shape {}")
+        self.write_file("pom.xml", "<project/>")
+
+        pool = LanguageServerPool(self.root_path)
+        self.assertIs(pool.get(self.java), lsp)
+        create_language_server.assert_called_once_with(self.java, self.root_path)
+        lsp.start_server.return_value.__enter__.assert_called_once()
+        notify.assert_not_called()
+
+        # An unchanged workspace is not notified.
+        self.assertIs(pool.get(self.java), lsp)
+        notify.assert_not_called()
+
+        self.write_file("a/Square.java", "class Square extends Shape {}")
+        os.remove(os.path.join(self.root_path, "a", "Shape.java"))
+        self.write_file("a/Circle.java", "class Circle {}")
+        self.assertIs(pool.get(self.java), lsp)
+        create_language_server.assert_called_once()
+        notify.assert_called_once_with({"changes": [{"uri": self.uri("a/Circle.java"), "type": FILE_CREATED},
+                                                    {"uri": self.uri("a/Shape.java"), "type": FILE_DELETED},
+                                                    {"uri": self.uri("a/Square.java"), "type": FILE_CHANGED}]})
+
+        pool.close()
+        lsp.start_server.return_value.__exit__.assert_called_once()
+        # A closed pool starts the language server again.
+        pool.get(self.java)
+        self.assertEqual(create_language_server.call_count, 2)
+
+    ### BEGIN HELPER METHODS ###
+
+    def write_file(self, file_name, content):
+        os.makedirs(os.path.dirname(os.path.join(self.root_path, file_name)), exist_ok=True)
+        with open(os.path.join(self.root_path, file_name), 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def uri(self, file_name):
+        return Path(os.path.join(self.root_path, file_name)).as_uri()
+
+if __name__ == '__main__':
+    unittest.main()
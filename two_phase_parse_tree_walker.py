@@ -3,6 +3,7 @@ from antlr4.tree.Tree import ParseTreeListener
 from owl_constructor import OWLConstructor
 from asbstract_syntax_tree import AST
 from antlr4 import ParseTreeWalker
+from antlr4.tree.Tree import TerminalNode
 
 class TwoPhaseParseTreeWalker(ParseTreeWalker):
     """Custom ParseTreeWalker that walks the ParseTree in two phases:
@@ -23,3 +24,47 @@ class TwoPhaseParseTreeWalker(ParseTreeWalker):
         listener.initializationPhase = False
         listener.currentFilePath = t.file_path
         return super().walk(listener, t.tree)
+
+    def referenceWalk(self, listener: Union[ParseTreeListener, OWLConstructor], t: AST):
+        """Visits the ParseTree of a file that is not walked in the regular phase, to collect the references that the regular walks of other files need.
+
+        The contexts are visited in the order of a walk, so the references are collected in the same order as in a run that walks every file.
+        See OWLConstructor.collect_declaration_references.
+        """
+        print("Parsing phase 2: references to the declarations for file", t.file_path)
+        listener.initializationPhase = False
+        listener.currentFilePath = t.file_path
+        stack = [t.tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, TerminalNode):
+                continue
+            listener.collect_declaration_references(node)
+            if node.children:
+                stack.extend(reversed(node.children))
+
+    def recordingWalk(self, listener: Union[ParseTreeListener, OWLConstructor], t: AST) -> list:
+        """Walks the ParseTree like the regular phase, but without lasting effects.
+
+        Returns the language server requests the walk needed that were not in the cache yet, see OWLConstructor.start_dry_walk.
+        Listeners move the start of some tokens, so the positions of the tokens are restored as well.
+        """
+        listener.initializationPhase = False
+        listener.currentFilePath = t.file_path
+        tokens = []
+        stack = [t.tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, TerminalNode):
+                tokens.append((node.symbol, node.symbol.line, node.symbol.column))
+            elif node.children:
+                stack.extend(node.children)
+
+        listener.start_dry_walk()
+        try:
+            super().walk(listener, t.tree)
+        finally:
+            requests = listener.end_dry_walk()
+            for token, line, column in tokens:
+                token.line, token.column = line, column
+        return requests